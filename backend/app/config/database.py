@@ -4,57 +4,106 @@
 """
 
 import logging
-from typing import AsyncGenerator
+import threading
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import AsyncGenerator, Callable, Optional, TypeVar
 from contextlib import asynccontextmanager
+from functools import lru_cache
 
-from sqlalchemy import create_engine, MetaData
+import anyio
+import orjson
+from sqlalchemy import bindparam, create_engine, event, MetaData
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base, sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import DeclarativeBase, scoped_session, sessionmaker, Session
+from sqlalchemy.pool import QueuePool, StaticPool
 
-from .settings import settings
+from .settings import settings, DB_URL, DEFAULT_TENANT_ID, TENANT_ISOLATION
 
 logger = logging.getLogger(__name__)
 
+R = TypeVar('R')
+
 # 数据库元数据
 metadata = MetaData()
 
+
 # 声明性基类
-Base = declarative_base(metadata=metadata)
+class Base(DeclarativeBase):
+    """ORM模型声明性基类"""
+    metadata = metadata
+
+
+def _json_dumps(value) -> str:
+    """JSON列序列化（orjson）"""
+    return orjson.dumps(value).decode()
+
 
 # 数据库引擎配置
 engine_kwargs = {
     "echo": settings.database_echo,
     "future": True,
+    "json_serializer": _json_dumps,
+    "json_deserializer": orjson.loads,
 }
 
+is_sqlite = DB_URL.startswith("sqlite")
+is_memory_sqlite = is_sqlite and ":memory:" in DB_URL
+
+# SQLite连接级PRAGMA（每个新连接执行一次）
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """为新建的SQLite连接设置PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 # 同步数据库引擎
-if settings.database_url.startswith("sqlite"):
-    # SQLite特殊配置
+if is_memory_sqlite:
+    # 内存数据库只能共享单个连接
     engine_kwargs.update({
         "poolclass": StaticPool,
+        "connect_args": {"check_same_thread": False},
+    })
+elif is_sqlite:
+    # 文件SQLite使用连接池，配合WAL实现并发读
+    engine_kwargs.update({
+        "poolclass": QueuePool,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
         "connect_args": {
             "check_same_thread": False,  # 允许多线程访问SQLite
             "timeout": 20,  # 连接超时
         },
     })
 
-sync_engine = create_engine(settings.database_url, **engine_kwargs)
+sync_engine = create_engine(DB_URL, **engine_kwargs)
 
 # 异步数据库引擎（如果需要）
-if settings.database_url.startswith("sqlite"):
-    # SQLite异步支持
-    async_database_url = settings.database_url.replace("sqlite://", "sqlite+aiosqlite://")
-    async_engine = create_async_engine(
-        async_database_url,
-        echo=settings.database_echo,
-        future=True,
-        poolclass=StaticPool,
-        connect_args={"check_same_thread": False},
-    )
+if is_sqlite:
+    # SQLite本身是同步的，aiosqlite只是把同步调用转发到后台线程，
+    # 因此不创建异步引擎，异步场景通过 run_sync_session 在线程池中使用同步引擎
+    async_engine = None
 else:
     # 其他数据库的异步支持
-    async_engine = create_async_engine(settings.database_url, **engine_kwargs)
+    async_engine = create_async_engine(DB_URL, **engine_kwargs)
+
+if is_sqlite and not is_memory_sqlite:
+    event.listen(sync_engine, "connect", _set_sqlite_pragmas)
 
 # 会话制造器
 SessionLocal = sessionmaker(
@@ -65,6 +114,56 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+
+class RecyclableSession(Session):
+    """关闭后可归还到会话对象池复用的同步会话"""
+    
+    _recycle = None
+    
+    def close(self) -> None:
+        super().close()
+        recycle, self._recycle = self._recycle, None
+        if recycle is not None:
+            recycle(self)
+
+
+class RecyclableAsyncSession(AsyncSession):
+    """关闭后可归还到会话对象池复用的异步会话"""
+    
+    _recycle = None
+    
+    async def close(self) -> None:
+        await super().close()
+        recycle, self._recycle = self._recycle, None
+        if recycle is not None:
+            recycle(self)
+
+
+# 请求级会话作用域（由中间件绑定请求ID）
+_session_scope: ContextVar[Optional[str]] = ContextVar("db_session_scope", default=None)
+
+
+def _get_session_scope():
+    """获取当前会话作用域，未绑定请求时退化为线程作用域"""
+    scope = _session_scope.get()
+    if scope is None:
+        return threading.get_ident()
+    return scope
+
+
+def bind_session_scope(scope_id: str) -> Token:
+    """将后续数据库会话绑定到指定请求作用域"""
+    return _session_scope.set(scope_id)
+
+
+def reset_session_scope(token: Token) -> None:
+    """解除请求作用域绑定"""
+    _session_scope.reset(token)
+
+
+# 请求作用域会话，同一请求内的依赖共享同一个Session
+ScopedSession = scoped_session(SessionLocal, scopefunc=_get_session_scope)
+
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
     class_=AsyncSession,
@@ -74,13 +173,70 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# 可复用会话制造器（供DatabaseManager会话对象池使用）
+PooledSessionLocal = sessionmaker(
+    bind=sync_engine,
+    class_=RecyclableSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+PooledAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=RecyclableAsyncSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def _require_async_engine():
+    """检查异步引擎是否可用"""
+    if async_engine is None:
+        raise RuntimeError("SQLite未启用异步引擎，请使用 run_sync_session 在线程池中执行数据库操作")
+
+
+def configure_thread_limiter():
+    """根据连接池大小调整线程池上限（需在事件循环中调用）"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    pool_capacity = settings.database_pool_size + settings.database_max_overflow
+    limiter.total_tokens = max(limiter.total_tokens, 40, pool_capacity * 4)
+
+
+async def run_sync_session(func: Callable[[Session], R]) -> R:
+    """
+    在线程池中使用同步会话执行数据库操作
+    使用方式：
+    users = await run_sync_session(lambda db: db.query(User).all())
+    """
+    def _run() -> R:
+        with SessionLocal() as session:
+            try:
+                result = func(session)
+                session.commit()
+                return result
+            except Exception:
+                session.rollback()
+                raise
+    
+    return await anyio.to_thread.run_sync(_run)
+
+
 class DatabaseManager:
     """数据库管理器"""
     
+    __slots__ = ("sync_engine", "async_engine", "metadata", "_session_pool", "_async_session_pool")
+    
     def __init__(self):
         self.sync_engine = sync_engine
         self.async_engine = async_engine
         self.metadata = metadata
+        
+        # 会话对象池：关闭后的会话归还复用，容量与连接池上限一致
+        pool_capacity = settings.database_pool_size + settings.database_max_overflow
+        self._session_pool = deque(maxlen=pool_capacity)
+        self._async_session_pool = deque(maxlen=pool_capacity)
     
     def create_all_tables(self):
         """创建所有数据表"""
@@ -103,33 +259,45 @@ class DatabaseManager:
     async def async_create_all_tables(self):
         """异步创建所有数据表"""
         try:
-            async with self.async_engine.begin() as conn:
-                await conn.run_sync(metadata.create_all)
+            if self.async_engine is None:
+                await anyio.to_thread.run_sync(metadata.create_all, self.sync_engine)
+            else:
+                async with self.async_engine.begin() as conn:
+                    await conn.run_sync(metadata.create_all)
             logger.info("数据库表异步创建成功")
         except Exception as e:
             logger.error(f"数据库表异步创建失败: {e}")
             raise
     
     def get_sync_session(self) -> Session:
-        """获取同步数据库会话"""
-        return SessionLocal()
+        """获取同步数据库会话（优先复用对象池中的会话）"""
+        try:
+            session = self._session_pool.pop()
+        except IndexError:
+            session = PooledSessionLocal()
+        session._recycle = self._session_pool.append
+        return session
     
     def get_async_session(self) -> AsyncSession:
-        """获取异步数据库会话"""
-        return AsyncSessionLocal()
+        """获取异步数据库会话（优先复用对象池中的会话）"""
+        _require_async_engine()
+        try:
+            session = self._async_session_pool.pop()
+        except IndexError:
+            session = PooledAsyncSessionLocal()
+        session._recycle = self._async_session_pool.append
+        return session
     
     @asynccontextmanager
     async def get_async_session_context(self) -> AsyncGenerator[AsyncSession, None]:
         """获取异步数据库会话上下文管理器"""
-        async with AsyncSessionLocal() as session:
+        async with self.get_async_session() as session:
             try:
                 yield session
                 await session.commit()
             except Exception:
                 await session.rollback()
                 raise
-            finally:
-                await session.close()
 
 
 # 全局数据库管理器实例
@@ -144,11 +312,11 @@ def get_db() -> Session:
     def get_users(db: Session = Depends(get_db)):
         ...
     """
-    db = SessionLocal()
+    db = ScopedSession()
     try:
         yield db
     finally:
-        db.close()
+        ScopedSession.remove()
 
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
@@ -159,6 +327,7 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     async def get_users(db: AsyncSession = Depends(get_async_db)):
         ...
     """
+    _require_async_engine()
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -166,8 +335,34 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
+
+
+# 租户隔离开关（模块加载时读取一次）
+TENANT_ISOLATION_ENABLED = TENANT_ISOLATION
+
+# 当前请求的租户ID（由租户上下文中间件设置）
+_current_tenant: ContextVar[str] = ContextVar("tenant_id", default=DEFAULT_TENANT_ID)
+
+
+def current_tenant() -> str:
+    """获取当前租户ID"""
+    return _current_tenant.get()
+
+
+def set_current_tenant(tenant_id: str) -> Token:
+    """设置当前租户ID"""
+    return _current_tenant.set(tenant_id)
+
+
+def reset_current_tenant(token: Token) -> None:
+    """恢复之前的租户ID"""
+    _current_tenant.reset(token)
+
+
+@lru_cache(maxsize=None)
+def _tenant_filter_clause(model):
+    """获取模型的预编译租户过滤条件（每个模型只构建一次）"""
+    return model.tenant_id == bindparam("tenant_id_param")
 
 
 class TenantDatabaseMixin:
@@ -176,23 +371,21 @@ class TenantDatabaseMixin:
     为模型提供多租户支持
     """
     
-    @classmethod
-    def filter_by_tenant(cls, query, tenant_id: str):
-        """根据租户ID过滤查询"""
-        if hasattr(cls, 'tenant_id') and settings.tenant_isolation:
-            return query.filter(cls.tenant_id == tenant_id)
-        return query
+    _tenant_filter_enabled = False
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 在类创建时预先计算是否需要租户过滤
+        cls._tenant_filter_enabled = TENANT_ISOLATION_ENABLED and hasattr(cls, 'tenant_id')
     
     @classmethod
-    def get_tenant_context(cls, tenant_id: str = None) -> dict:
-        """获取租户上下文"""
-        if tenant_id is None:
-            tenant_id = settings.default_tenant_id
-        
-        return {
-            "tenant_id": tenant_id,
-            "isolation_enabled": settings.tenant_isolation,
-        }
+    def filter_by_tenant(cls, query, tenant_id: str = None):
+        """根据租户ID过滤查询（未指定时使用当前租户）"""
+        if cls._tenant_filter_enabled:
+            if tenant_id is None:
+                tenant_id = _current_tenant.get()
+            return query.filter(_tenant_filter_clause(cls)).params(tenant_id_param=tenant_id)
+        return query
 
 
 def init_database():
@@ -224,9 +417,12 @@ async def async_init_database():
         await db_manager.async_create_all_tables()
         
         # 创建默认数据（如果需要）
-        async with db_manager.get_async_session_context() as db:
-            # 这里可以添加默认数据的创建逻辑
-            pass
+        if async_engine is None:
+            await run_sync_session(lambda db: None)  # 这里可以添加默认数据的创建逻辑
+        else:
+            async with db_manager.get_async_session_context() as db:
+                # 这里可以添加默认数据的创建逻辑
+                pass
         
         logger.info("数据库异步初始化完成")
         
@@ -4,11 +4,23 @@
 """
 
 import os
+import re
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, validator
 
 
+# CORS源分隔符（逗号及其两侧空白）
+_CORS_SEPARATOR_RE = re.compile(r'\s*,\s*')
+
+
+@lru_cache(maxsize=8)
+def _parse_cors(v: str) -> tuple:
+    """解析逗号分隔的CORS源配置（按原始字符串缓存）"""
+    return tuple(_CORS_SEPARATOR_RE.split(v.strip()))
+
+
 class Settings(BaseSettings):
     """应用配置类"""
     
@@ -26,12 +38,18 @@ class Settings(BaseSettings):
     # 数据库配置
     database_url: str = Field(default="sqlite:///./security_intercom.db", description="数据库URL")
     database_echo: bool = Field(default=False, description="数据库SQL日志")
+    database_pool_size: int = Field(default=5, description="数据库连接池大小")
+    database_max_overflow: int = Field(default=10, description="数据库连接池最大溢出连接数")
     
     # 安全配置
     secret_key: str = Field(..., description="JWT密钥")
     algorithm: str = Field(default="HS256", description="JWT算法")
     access_token_expire_minutes: int = Field(default=30, description="访问令牌过期时间（分钟）")
     refresh_token_expire_days: int = Field(default=7, description="刷新令牌过期时间（天）")
+    password_hash_memory_cost: int = Field(default=65536, description="Argon2密码哈希内存开销（KiB）")
+    password_hash_time_cost: int = Field(default=3, description="Argon2密码哈希迭代次数")
+    password_hash_parallelism: int = Field(default=2, description="Argon2密码哈希并行度")
+    password_hash_concurrency: int = Field(default=os.cpu_count() or 1, description="同时进行的密码哈希计算上限")
     
     # CORS配置
     cors_origins: List[str] = Field(default=["http://localhost:3000"], description="CORS允许的源")
@@ -90,7 +108,7 @@ class Settings(BaseSettings):
     def assemble_cors_origins(cls, v: str | List[str]) -> List[str]:
         """处理CORS源配置"""
         if isinstance(v, str) and not v.startswith('['):
-            return [i.strip() for i in v.split(',')]
+            return list(_parse_cors(v))
         elif isinstance(v, (list, str)):
             return v
         raise ValueError(v)
@@ -102,10 +120,13 @@ class Settings(BaseSettings):
             raise ValueError('密钥长度不能少于32个字符')
         return v
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        frozen=True,
+        validate_assignment=False,
+    )
 
 
 class DevelopmentSettings(Settings):
@@ -134,19 +155,32 @@ class ProductionSettings(Settings):
     environment: str = "production"
 
 
+# 环境与配置类映射
+SETTINGS_MAP = {
+    "development": DevelopmentSettings,
+    "test": TestSettings,
+    "production": ProductionSettings,
+}
+
+
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """根据环境变量获取配置"""
+    """
+    根据环境变量获取配置（结果缓存，可直接用作FastAPI依赖）
+    使用方式：
+    @app.get("/info")
+    def info(settings: Settings = Depends(get_settings)):
+        ...
+    """
     env = os.getenv("ENVIRONMENT", "production").lower()
-    
-    settings_map = {
-        "development": DevelopmentSettings,
-        "test": TestSettings,
-        "production": ProductionSettings,
-    }
-    
-    settings_class = settings_map.get(env, ProductionSettings)
+    settings_class = SETTINGS_MAP.get(env, ProductionSettings)
     return settings_class()
 
 
 # 全局配置实例
 settings = get_settings()
+
+# 热路径常用配置（配置不可变，导出为模块常量避免重复属性查找）
+TENANT_ISOLATION = settings.tenant_isolation
+DEFAULT_TENANT_ID = settings.default_tenant_id
+DB_URL = settings.database_url
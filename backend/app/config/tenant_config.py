@@ -3,16 +3,20 @@
 支持多租户的配置和主题定制
 """
 
-import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
+import aiofiles
+import anyio
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class TenantThemeConfig:
     """租户主题配置"""
     primary_color: str = "#1890ff"
@@ -28,7 +32,7 @@ class TenantThemeConfig:
     favicon_url: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TenantFeatureConfig:
     """租户功能配置"""
     enable_user_management: bool = True
@@ -45,7 +49,7 @@ class TenantFeatureConfig:
     max_concurrent_calls: int = 10
 
 
-@dataclass
+@dataclass(slots=True)
 class TenantNotificationConfig:
     """租户通知配置"""
     email_enabled: bool = False
@@ -63,7 +67,7 @@ class TenantNotificationConfig:
             self.notification_channels = ["system", "alarm", "device"]
 
 
-@dataclass
+@dataclass(slots=True)
 class TenantSecurityConfig:
     """租户安全配置"""
     password_policy: Dict[str, Any] = None
@@ -93,7 +97,7 @@ class TenantSecurityConfig:
             }
 
 
-@dataclass
+@dataclass(slots=True)
 class TenantConfig:
     """租户完整配置"""
     tenant_id: str
@@ -121,21 +125,71 @@ class TenantConfig:
             self.custom_settings = {}
 
 
+# 配置字段集合（模块加载时预计算，避免运行时反射）
+_TENANT_FIELDS = frozenset(TenantConfig.__dataclass_fields__)
+_NESTED_CONFIGS = (
+    ('theme', TenantThemeConfig),
+    ('features', TenantFeatureConfig),
+    ('notifications', TenantNotificationConfig),
+    ('security', TenantSecurityConfig),
+)
+_NESTED_CONFIG_FIELDS = {
+    key: frozenset(config_class.__dataclass_fields__)
+    for key, config_class in _NESTED_CONFIGS
+}
+
+
+def _hydrate_nested_configs(config_data: Dict[str, Any]) -> Dict[str, Any]:
+    """将嵌套的配置字典转换为配置对象"""
+    for key, config_class in _NESTED_CONFIGS:
+        value = config_data.get(key)
+        if isinstance(value, dict):
+            config_data[key] = config_class(**value)
+    return config_data
+
+
 class TenantConfigManager:
     """租户配置管理器"""
     
-    def __init__(self, config_dir: str = "./tenant_configs"):
+    __slots__ = (
+        "config_dir", "flush_delay", "_dirty_tenants", "_flush_task",
+        "_configs", "_config_paths", "_config_dicts",
+    )
+    
+    def __init__(self, config_dir: str = "./tenant_configs", flush_delay: float = 0.5):
         self.config_dir = Path(config_dir)
         self.config_dir.mkdir(exist_ok=True)
+        # 异步批量写入：待写入的租户ID及后台刷新任务
+        self.flush_delay = flush_delay
+        self._dirty_tenants: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
         self._configs: Dict[str, TenantConfig] = {}
-        self._load_all_configs()
+        # 配置文件路径缓存（路径在管理器生命周期内不变）
+        self._config_paths: Dict[str, Path] = {}
+        # asdict结果缓存，仅在配置变更时失效
+        self._config_dicts: Dict[str, Dict[str, Any]] = {}
     
     def _get_config_file_path(self, tenant_id: str) -> Path:
         """获取租户配置文件路径"""
-        return self.config_dir / f"{tenant_id}.json"
+        path = self._config_paths.get(tenant_id)
+        if path is None:
+            path = self._config_paths[tenant_id] = self.config_dir / f"{tenant_id}.json"
+        return path
+    
+    def _config_to_dict(self, config: TenantConfig) -> Dict[str, Any]:
+        """获取配置字典（缓存asdict结果，调用方不得修改）"""
+        config_dict = self._config_dicts.get(config.tenant_id)
+        if config_dict is None:
+            config_dict = asdict(config)
+            self._config_dicts[config.tenant_id] = config_dict
+        return config_dict
+    
+    def _invalidate_config_dict(self, tenant_id: str):
+        """使配置字典缓存失效"""
+        self._config_dicts.pop(tenant_id, None)
     
     def _load_all_configs(self):
-        """加载所有租户配置"""
+        """加载所有租户配置（仅在需要全量配置时调用）"""
         try:
             for config_file in self.config_dir.glob("*.json"):
                 tenant_id = config_file.stem
@@ -151,40 +205,48 @@ class TenantConfigManager:
             return None
         
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            with open(config_file, 'rb') as f:
+                config_data = orjson.loads(f.read())
             
             # 转换嵌套配置对象
-            if 'theme' in config_data and isinstance(config_data['theme'], dict):
-                config_data['theme'] = TenantThemeConfig(**config_data['theme'])
-            
-            if 'features' in config_data and isinstance(config_data['features'], dict):
-                config_data['features'] = TenantFeatureConfig(**config_data['features'])
-            
-            if 'notifications' in config_data and isinstance(config_data['notifications'], dict):
-                config_data['notifications'] = TenantNotificationConfig(**config_data['notifications'])
-            
-            if 'security' in config_data and isinstance(config_data['security'], dict):
-                config_data['security'] = TenantSecurityConfig(**config_data['security'])
+            _hydrate_nested_configs(config_data)
             
             config = TenantConfig(**config_data)
             self._configs[tenant_id] = config
+            self._invalidate_config_dict(tenant_id)
             return config
             
         except Exception as e:
             logger.error(f"加载租户配置 {tenant_id} 失败: {e}")
             return None
     
+    def _serialize_config(self, config: TenantConfig) -> bytes:
+        """序列化租户配置"""
+        # 转换为字典并处理嵌套对象
+        config_dict = self._config_to_dict(config)
+        return orjson.dumps(config_dict, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    
     def _save_config(self, config: TenantConfig):
-        """保存租户配置"""
+        """保存租户配置（同步，用于初始化和命令行场景）"""
         config_file = self._get_config_file_path(config.tenant_id)
         
         try:
-            # 转换为字典并处理嵌套对象
-            config_dict = asdict(config)
+            with open(config_file, 'wb') as f:
+                f.write(self._serialize_config(config))
+            
+            logger.info(f"租户配置 {config.tenant_id} 保存成功")
             
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_dict, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.error(f"保存租户配置 {config.tenant_id} 失败: {e}")
+            raise
+    
+    async def _save_config_async(self, config: TenantConfig):
+        """异步保存租户配置，不阻塞事件循环"""
+        config_file = self._get_config_file_path(config.tenant_id)
+        
+        try:
+            async with aiofiles.open(config_file, 'wb') as f:
+                await f.write(self._serialize_config(config))
             
             logger.info(f"租户配置 {config.tenant_id} 保存成功")
             
@@ -192,6 +254,48 @@ class TenantConfigManager:
             logger.error(f"保存租户配置 {config.tenant_id} 失败: {e}")
             raise
     
+    def _schedule_save(self, tenant_id: str):
+        """标记租户配置待写入，由后台任务合并写入"""
+        self._dirty_tenants.add(tenant_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+    
+    async def _delayed_flush(self):
+        """等待一个合并窗口后写入所有待写入配置"""
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+    
+    async def flush(self) -> List[str]:
+        """立即写入所有待写入的租户配置，返回写入失败的租户ID（仍保留待写入标记，下次刷新时重试）"""
+        failed: Set[str] = set()
+        while True:
+            pending = self._dirty_tenants - failed
+            if not pending:
+                break
+            for tenant_id in pending:
+                # 先移除标记：写入期间的新变更会重新标记
+                self._dirty_tenants.discard(tenant_id)
+                config = self._configs.get(tenant_id)
+                if config is None:
+                    continue
+                try:
+                    await self._save_config_async(config)
+                except Exception:
+                    # 错误已记录，恢复待写入标记后继续写入其他租户
+                    self._dirty_tenants.add(tenant_id)
+                    failed.add(tenant_id)
+        return list(failed)
+    
+    async def close(self):
+        """关闭时写入：等待进行中的后台写入结束后再刷新一次，写入失败时记录错误"""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        self._flush_task = None
+        
+        failed = await self.flush()
+        if failed:
+            logger.error(f"关闭时租户配置写入失败，以下租户的变更未落盘: {', '.join(failed)}")
+    
     def get_config(self, tenant_id: str) -> Optional[TenantConfig]:
         """获取租户配置"""
         if tenant_id not in self._configs:
@@ -201,6 +305,10 @@ class TenantConfigManager:
             return config
         return self._configs[tenant_id]
     
+    def get_cached_config(self, tenant_id: str) -> Optional[TenantConfig]:
+        """获取已加载的租户配置（不触发文件读写，未加载时返回None）"""
+        return self._configs.get(tenant_id)
+    
     def _create_default_config(self, tenant_id: str) -> TenantConfig:
         """创建默认租户配置"""
         config = TenantConfig(
@@ -213,24 +321,38 @@ class TenantConfigManager:
     
     def update_config(self, tenant_id: str, updates: Dict[str, Any]) -> TenantConfig:
         """更新租户配置"""
+        config = self._apply_updates(tenant_id, updates)
+        self._save_config(config)
+        return config
+    
+    async def update_config_async(self, tenant_id: str, updates: Dict[str, Any]) -> TenantConfig:
+        """更新租户配置（异步接口，写入由后台任务合并完成）"""
+        # 未加载的配置先在线程池中读取/创建，避免文件读写阻塞事件循环
+        await aget_tenant_config(tenant_id)
+        config = self._apply_updates(tenant_id, updates)
+        self._schedule_save(tenant_id)
+        return config
+    
+    def _apply_updates(self, tenant_id: str, updates: Dict[str, Any]) -> TenantConfig:
+        """将更新应用到内存中的租户配置"""
         config = self.get_config(tenant_id)
         if config is None:
             raise ValueError(f"租户 {tenant_id} 不存在")
         
         # 更新配置字段
         for key, value in updates.items():
-            if hasattr(config, key):
-                setattr(config, key, value)
-            elif key in ['theme', 'features', 'notifications', 'security']:
+            nested_fields = _NESTED_CONFIG_FIELDS.get(key)
+            if nested_fields is not None and isinstance(value, dict):
                 nested_config = getattr(config, key)
-                if isinstance(value, dict) and nested_config:
-                    for nested_key, nested_value in value.items():
-                        if hasattr(nested_config, nested_key):
-                            setattr(nested_config, nested_key, nested_value)
+                for nested_key, nested_value in value.items():
+                    if nested_key in nested_fields:
+                        setattr(nested_config, nested_key, nested_value)
+            elif key in _TENANT_FIELDS:
+                setattr(config, key, value)
             else:
                 config.custom_settings[key] = value
         
-        self._save_config(config)
+        self._invalidate_config_dict(tenant_id)
         return config
     
     def delete_config(self, tenant_id: str):
@@ -241,23 +363,33 @@ class TenantConfigManager:
         
         if tenant_id in self._configs:
             del self._configs[tenant_id]
+        self._invalidate_config_dict(tenant_id)
+        self._dirty_tenants.discard(tenant_id)
         
         logger.info(f"租户配置 {tenant_id} 已删除")
     
     def list_tenants(self) -> List[str]:
-        """列出所有租户ID"""
-        return list(self._configs.keys())
+        """列出所有租户ID（只扫描文件名，不解析配置）"""
+        tenant_ids = dict.fromkeys(self._configs)
+        tenant_ids.update(dict.fromkeys(f.stem for f in self.config_dir.glob("*.json")))
+        return list(tenant_ids)
     
     def get_active_tenants(self) -> List[TenantConfig]:
         """获取活跃租户配置"""
-        return [config for config in self._configs.values() if config.active]
+        configs = []
+        for tenant_id in self.list_tenants():
+            config = self._configs.get(tenant_id) or self._load_config(tenant_id)
+            if config is not None and config.active:
+                configs.append(config)
+        return configs
     
     def export_config(self, tenant_id: str) -> Dict[str, Any]:
         """导出租户配置"""
         config = self.get_config(tenant_id)
         if config is None:
             raise ValueError(f"租户 {tenant_id} 不存在")
-        return asdict(config)
+        # orjson往返得到缓存字典的深拷贝，避免调用方修改缓存
+        return orjson.loads(orjson.dumps(self._config_to_dict(config), option=orjson.OPT_NON_STR_KEYS))
     
     def import_config(self, config_data: Dict[str, Any]) -> TenantConfig:
         """导入租户配置"""
@@ -267,20 +399,11 @@ class TenantConfigManager:
         tenant_id = config_data['tenant_id']
         
         # 转换嵌套配置对象
-        if 'theme' in config_data and isinstance(config_data['theme'], dict):
-            config_data['theme'] = TenantThemeConfig(**config_data['theme'])
-        
-        if 'features' in config_data and isinstance(config_data['features'], dict):
-            config_data['features'] = TenantFeatureConfig(**config_data['features'])
-        
-        if 'notifications' in config_data and isinstance(config_data['notifications'], dict):
-            config_data['notifications'] = TenantNotificationConfig(**config_data['notifications'])
-        
-        if 'security' in config_data and isinstance(config_data['security'], dict):
-            config_data['security'] = TenantSecurityConfig(**config_data['security'])
+        _hydrate_nested_configs(config_data)
         
         config = TenantConfig(**config_data)
         self._configs[tenant_id] = config
+        self._invalidate_config_dict(tenant_id)
         self._save_config(config)
         
         return config
@@ -293,3 +416,22 @@ tenant_config_manager = TenantConfigManager()
 def get_tenant_config(tenant_id: str) -> TenantConfig:
     """获取租户配置的便捷函数"""
     return tenant_config_manager.get_config(tenant_id)
+
+
+# 租户配置首次加载锁，合并同一租户的并发加载
+_tenant_load_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def aget_tenant_config(tenant_id: str) -> TenantConfig:
+    """获取租户配置（异步）：已加载时直接返回，否则在线程池中加载（并发请求只加载一次）"""
+    config = tenant_config_manager.get_cached_config(tenant_id)
+    if config is not None:
+        return config
+    
+    lock = _tenant_load_locks.setdefault(tenant_id, asyncio.Lock())
+    async with lock:
+        config = tenant_config_manager.get_cached_config(tenant_id)
+        if config is None:
+            config = await anyio.to_thread.run_sync(get_tenant_config, tenant_id)
+    _tenant_load_locks.pop(tenant_id, None)
+    return config
@@ -3,38 +3,132 @@
 提供用户登录、登出、令牌刷新等认证相关API
 """
 
-from typing import Dict, Any
+import logging
+from typing import Annotated, Any, Dict, List, Optional, Type, TypeVar
 from datetime import datetime, timedelta
 
-from fastapi import Depends, HTTPException, status, Body
-from pydantic import BaseModel, Field, EmailStr
+import msgspec
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
 
-from .base_controller import StandardResponse
 from ..services.user_service import UserService
-from ..core.dependencies import TenantContext, get_tenant_context
-from ..core.security import CurrentUser, get_current_user, security_manager
-from ..core.exceptions import AuthenticationError
+from ..core.dependencies import TenantDep, UserDep
+from ..core.security import MAX_PASSWORD_LENGTH, security, security_manager
+from ..core.token_blacklist import token_blacklist
+from ..core.permission_cache import permission_cache, user_info_key
+from ..core.redis_client import get_redis
+from ..core.exceptions import AuthenticationError, ValidationError
 
+logger = logging.getLogger(__name__)
 
-class LoginRequest(BaseModel):
+StructT = TypeVar('StructT', bound=msgspec.Struct)
+
+# 用户信息缓存有效期（秒）
+USER_INFO_TTL = 300
+
+
+class LoginRequest(msgspec.Struct, frozen=True, kw_only=True):
     """登录请求模型"""
-    username: str = Field(..., description="用户名或邮箱")
-    password: str = Field(..., description="密码")
-    remember_me: bool = Field(False, description="记住我")
+    username: str  # 用户名或邮箱
+    password: Annotated[str, msgspec.Meta(max_length=MAX_PASSWORD_LENGTH)]  # 密码
+    remember_me: bool = False  # 记住我
 
 
-class LoginResponse(BaseModel):
-    """登录响应模型"""
+class RefreshTokenRequest(msgspec.Struct, frozen=True, kw_only=True):
+    """刷新令牌请求模型"""
+    refresh_token: str  # 刷新令牌
+
+
+class RoleOut(msgspec.Struct, frozen=True, kw_only=True):
+    """角色信息"""
+    code: str
+    name: str
+
+
+class UserInfoOut(msgspec.Struct, frozen=True, kw_only=True):
+    """登录用户信息"""
+    id: str
+    username: str
+    email: str
+    real_name: Optional[str] = None
+    nickname: Optional[str] = None
+    is_active: bool
+    is_superuser: bool
+    roles: List[RoleOut]
+    permissions: List[str]
+    last_login: Optional[datetime] = None
+
+
+class CurrentUserInfoOut(UserInfoOut, frozen=True, kw_only=True):
+    """当前用户详细信息"""
+    phone: Optional[str] = None
+    department: Optional[str] = None
+    position: Optional[str] = None
+    language: Optional[str] = None
+    timezone: Optional[str] = None
+    theme: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class TokenOut(msgspec.Struct, frozen=True, kw_only=True):
+    """访问令牌响应模型"""
     access_token: str
-    refresh_token: str
     token_type: str = "Bearer"
     expires_in: int
-    user_info: Dict[str, Any]
 
 
-class RefreshTokenRequest(BaseModel):
-    """刷新令牌请求模型"""
-    refresh_token: str = Field(..., description="刷新令牌")
+class RefreshTokenOut(TokenOut, frozen=True, kw_only=True):
+    """刷新令牌响应模型（刷新令牌轮换）"""
+    refresh_token: str
+
+
+class LoginResponse(RefreshTokenOut, frozen=True, kw_only=True):
+    """登录响应模型"""
+    user_info: CurrentUserInfoOut
+
+
+class AuthResponse(msgspec.Struct, kw_only=True):
+    """认证接口标准响应（结构与 StandardResponse 一致）"""
+    success: bool = True
+    message: str = "操作成功"
+    data: Any = None
+    error: Optional[Dict[str, Any]] = None
+
+
+class MsgspecJSONResponse(Response):
+    """使用msgspec编码的JSON响应"""
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return msgspec.json.encode(content)
+
+
+def decode_body(body: bytes, struct_type: Type[StructT]) -> StructT:
+    """用msgspec解码并校验JSON请求体，失败时抛出统一的数据验证错误"""
+    try:
+        return msgspec.json.decode(body, type=struct_type)
+    except (msgspec.ValidationError, msgspec.DecodeError) as e:
+        raise ValidationError("请求数据验证失败", details={"error": str(e)})
+
+
+def msgspec_body(struct_type: Type[StructT]):
+    """请求体依赖：直接用msgspec解码并校验JSON请求体"""
+    async def _decode(request: Request) -> StructT:
+        return decode_body(await request.body(), struct_type)
+    return _decode
+
+
+def msgspec_openapi_body(struct_type: Type[msgspec.Struct], required: bool = True) -> Dict[str, Any]:
+    """msgspec请求体的OpenAPI描述（路由 openapi_extra 使用，请求体由依赖读取时FastAPI不会自动生成）"""
+    _, components = msgspec.json.schema_components(
+        [struct_type], ref_template="#/components/schemas/{name}"
+    )
+    return {
+        "requestBody": {
+            "required": required,
+            "content": {"application/json": {"schema": components[struct_type.__name__]}},
+        }
+    }
 
 
 class AuthController:
@@ -42,222 +136,258 @@ class AuthController:
     
     def __init__(self):
         self.user_service = UserService()
+        # 令牌有效期（配置不可变，启动时计算一次）
+        self._access_ttl = timedelta(minutes=security_manager.access_token_expire_minutes)
+        self._remember_ttl = timedelta(days=7)  # 记住我：7天
+        self._refresh_ttl = timedelta(days=security_manager.refresh_token_expire_days)
+        self._access_ttl_seconds = int(self._access_ttl.total_seconds())
+        self._remember_ttl_seconds = int(self._remember_ttl.total_seconds())
     
-    async def login(
-        self,
-        login_data: LoginRequest = Body(...),
-        tenant_context: TenantContext = Depends(get_tenant_context)
-    ) -> StandardResponse:
-        """用户登录"""
+    @staticmethod
+    def _build_user_info(user, roles: List[Dict[str, str]], permissions: List[str]) -> CurrentUserInfoOut:
+        """构建当前用户信息"""
+        return CurrentUserInfoOut(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            real_name=user.real_name,
+            nickname=user.nickname,
+            phone=user.phone,
+            department=user.department,
+            position=user.position,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            roles=[RoleOut(**role) for role in roles],
+            permissions=permissions,
+            language=user.language,
+            timezone=user.timezone,
+            theme=user.theme,
+            last_login=user.last_login,
+            created_at=user.created_at,
+        )
+    
+    async def _cache_user_info(self, user_info: CurrentUserInfoOut, tenant_id: str) -> None:
+        """缓存已编码的用户信息（未配置Redis时跳过）"""
+        redis = get_redis()
+        if redis is None:
+            return
         try:
-            # 用户认证
-            user = self.user_service.authenticate_user(
-                login_data.username,
-                login_data.password,
-                tenant_context
-            )
-            
-            if not user:
-                raise AuthenticationError("用户名或密码错误")
-            
-            # 获取用户角色和权限
-            roles = self.user_service.get_user_roles(user.id, tenant_context)
-            permissions = self.user_service.get_user_permissions(user.id, tenant_context)
-            
-            # 生成JWT令牌
-            token_data = {
-                "sub": user.id,
-                "username": user.username,
-                "email": user.email,
-                "tenant_id": user.tenant_id,
-                "roles": [role.code for role in roles],
-                "permissions": permissions,
-                "is_active": user.is_active,
-                "is_superuser": user.is_superuser,
-            }
-            
-            # 设置令牌过期时间
-            access_token_expires = timedelta(minutes=security_manager.access_token_expire_minutes)
-            if login_data.remember_me:
-                access_token_expires = timedelta(days=7)  # 记住我：7天
-            
-            refresh_token_expires = timedelta(days=security_manager.refresh_token_expire_days)
-            
-            # 创建令牌
-            access_token = security_manager.create_access_token(token_data, access_token_expires)
-            refresh_token = security_manager.create_refresh_token(
-                {"sub": user.id, "tenant_id": user.tenant_id}, 
-                refresh_token_expires
-            )
-            
-            # 用户信息
-            user_info = {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "real_name": user.real_name,
-                "nickname": user.nickname,
-                "is_active": user.is_active,
-                "is_superuser": user.is_superuser,
-                "roles": [{"code": role.code, "name": role.name} for role in roles],
-                "permissions": permissions,
-                "last_login": user.last_login.isoformat() if user.last_login else None,
-            }
-            
-            response_data = {
-                "access_token": access_token,
-                "refresh_token": refresh_token,
-                "token_type": "Bearer",
-                "expires_in": int(access_token_expires.total_seconds()),
-                "user_info": user_info
-            }
-            
-            # 记录登录日志
-            # TODO: 实现登录日志记录
-            
-            return StandardResponse(
-                message="登录成功",
-                data=response_data
-            )
-            
-        except AuthenticationError as e:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=str(e)
+            await redis.set(
+                user_info_key(tenant_id, user_info.id),
+                msgspec.json.encode(user_info),
+                ex=USER_INFO_TTL
             )
         except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="登录过程发生错误"
-            )
+            logger.warning(f"写入用户信息缓存失败: {e}")
+    
+    async def login(
+        self,
+        login_data: LoginRequest = Depends(msgspec_body(LoginRequest)),
+        *,
+        tenant_context: TenantDep
+    ) -> MsgspecJSONResponse:
+        """用户登录"""
+        # 用户认证
+        user = await self.user_service.aauthenticate_user(
+            login_data.username,
+            login_data.password,
+            tenant_context
+        )
+        
+        if not user:
+            raise AuthenticationError("用户名或密码错误")
+        
+        # 获取用户角色和权限（优先读取缓存）
+        auth_data = await permission_cache.get_roles_and_perms(
+            user.id,
+            tenant_context.tenant_id,
+            lambda: self.user_service.aload_roles_and_permissions(user.id, tenant_context),
+        )
+        roles = auth_data["roles"]
+        permissions = auth_data["permissions"]
+        
+        # 生成JWT令牌
+        token_data = {
+            "sub": user.id,
+            "username": user.username,
+            "email": user.email,
+            "tenant_id": user.tenant_id,
+            "roles": [role["code"] for role in roles],
+            "permissions": permissions,
+            "is_active": user.is_active,
+            "is_superuser": user.is_superuser,
+        }
+        
+        # 设置令牌过期时间
+        if login_data.remember_me:
+            access_token_expires = self._remember_ttl
+            expires_in = self._remember_ttl_seconds
+        else:
+            access_token_expires = self._access_ttl
+            expires_in = self._access_ttl_seconds
+        
+        # 创建令牌
+        access_token = security_manager.create_access_token(token_data, access_token_expires)
+        refresh_token = security_manager.create_refresh_token(
+            {"sub": user.id, "tenant_id": user.tenant_id}, 
+            self._refresh_ttl
+        )
+        
+        # 用户信息：登录响应与当前用户信息接口共用，写入缓存
+        user_info = self._build_user_info(user, roles, permissions)
+        await self._cache_user_info(user_info, tenant_context.tenant_id)
+        
+        response_data = LoginResponse(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_in=expires_in,
+            user_info=user_info,
+        )
+        
+        # 记录登录日志
+        # TODO: 实现登录日志记录
+        
+        return MsgspecJSONResponse(AuthResponse(
+            message="登录成功",
+            data=response_data
+        ))
     
     async def logout(
         self,
-        current_user: CurrentUser = Depends(get_current_user)
-    ) -> StandardResponse:
-        """用户登出"""
-        try:
-            # TODO: 实现令牌黑名单或会话管理
-            # 这里可以将令牌加入黑名单，或者清理用户会话
-            
-            # 记录登出日志
-            # TODO: 实现登出日志记录
-            
-            return StandardResponse(
-                message="登出成功"
-            )
-            
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="登出过程发生错误"
-            )
+        request: Request,
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        *,
+        current_user: UserDep
+    ) -> MsgspecJSONResponse:
+        """用户登出（吊销当前访问令牌，请求体携带刷新令牌时一并吊销）"""
+        payload = security_manager.verify_access_token(credentials.credentials)
+        if payload:
+            await token_blacklist.revoke(payload.get("jti"), payload.get("exp"))
+        security_manager.invalidate_token(credentials.credentials)
+        
+        body = await request.body()
+        if body:
+            refresh_data = decode_body(body, RefreshTokenRequest)
+            refresh_payload = security_manager.verify_refresh_token(refresh_data.refresh_token)
+            if refresh_payload and refresh_payload.get("sub") == current_user.user_id:
+                await token_blacklist.revoke(refresh_payload.get("jti"), refresh_payload.get("exp"))
+                security_manager.invalidate_token(refresh_data.refresh_token)
+        
+        # 记录登出日志
+        # TODO: 实现登出日志记录
+        
+        return MsgspecJSONResponse(AuthResponse(
+            message="登出成功"
+        ))
     
     async def refresh_token(
         self,
-        refresh_data: RefreshTokenRequest = Body(...),
-        tenant_context: TenantContext = Depends(get_tenant_context)
-    ) -> StandardResponse:
+        refresh_data: RefreshTokenRequest = Depends(msgspec_body(RefreshTokenRequest)),
+        *,
+        tenant_context: TenantDep
+    ) -> MsgspecJSONResponse:
         """刷新访问令牌"""
-        try:
-            # 验证刷新令牌
-            payload = security_manager.verify_refresh_token(refresh_data.refresh_token)
-            
-            if not payload:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="无效的刷新令牌"
-                )
-            
-            user_id = payload.get("sub")
-            if not user_id:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="令牌格式错误"
-                )
-            
-            # 获取用户信息
-            user = self.user_service.get_by_id(user_id, tenant_context)
-            if not user or not user.is_active:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="用户账户已禁用"
-                )
-            
-            # 获取用户角色和权限
-            roles = self.user_service.get_user_roles(user.id, tenant_context)
-            permissions = self.user_service.get_user_permissions(user.id, tenant_context)
-            
-            # 生成新的访问令牌
-            token_data = {
-                "sub": user.id,
-                "username": user.username,
-                "email": user.email,
-                "tenant_id": user.tenant_id,
-                "roles": [role.code for role in roles],
-                "permissions": permissions,
-                "is_active": user.is_active,
-                "is_superuser": user.is_superuser,
-            }
-            
-            access_token_expires = timedelta(minutes=security_manager.access_token_expire_minutes)
-            new_access_token = security_manager.create_access_token(token_data, access_token_expires)
-            
-            response_data = {
-                "access_token": new_access_token,
-                "token_type": "Bearer",
-                "expires_in": int(access_token_expires.total_seconds())
-            }
-            
-            return StandardResponse(
-                message="令牌刷新成功",
-                data=response_data
+        # 验证刷新令牌
+        payload = security_manager.verify_refresh_token(refresh_data.refresh_token)
+        
+        if not payload or await token_blacklist.is_revoked(payload.get("jti")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="无效的刷新令牌"
             )
-            
-        except HTTPException:
-            raise
-        except Exception as e:
+        
+        user_id = payload.get("sub")
+        if not user_id:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="令牌刷新失败"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="令牌格式错误"
+            )
+        
+        # 获取用户信息
+        user = await self.user_service.aget_by_id(user_id, tenant_context)
+        if not user or not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="用户账户已禁用"
             )
+        
+        # 获取用户角色和权限（优先读取缓存）
+        auth_data = await permission_cache.get_roles_and_perms(
+            user.id,
+            tenant_context.tenant_id,
+            lambda: self.user_service.aload_roles_and_permissions(user.id, tenant_context),
+        )
+        roles = auth_data["roles"]
+        permissions = auth_data["permissions"]
+        
+        # 生成新的访问令牌
+        token_data = {
+            "sub": user.id,
+            "username": user.username,
+            "email": user.email,
+            "tenant_id": user.tenant_id,
+            "roles": [role["code"] for role in roles],
+            "permissions": permissions,
+            "is_active": user.is_active,
+            "is_superuser": user.is_superuser,
+        }
+        
+        # 刷新令牌一次性使用：吊销已使用的刷新令牌并签发新的刷新令牌
+        await token_blacklist.revoke(payload.get("jti"), payload.get("exp"))
+        security_manager.invalidate_token(refresh_data.refresh_token)
+        
+        new_access_token = security_manager.create_access_token(token_data, self._access_ttl)
+        new_refresh_token = security_manager.create_refresh_token(
+            {"sub": user.id, "tenant_id": user.tenant_id},
+            self._refresh_ttl
+        )
+        
+        response_data = RefreshTokenOut(
+            access_token=new_access_token,
+            refresh_token=new_refresh_token,
+            expires_in=self._access_ttl_seconds,
+        )
+        
+        return MsgspecJSONResponse(AuthResponse(
+            message="令牌刷新成功",
+            data=response_data
+        ))
     
     async def get_current_user_info(
         self,
-        current_user: CurrentUser = Depends(get_current_user),
-        tenant_context: TenantContext = Depends(get_tenant_context)
-    ) -> StandardResponse:
-        """获取当前用户信息"""
-        try:
-            user = self.user_service.get_by_id_or_404(current_user.user_id, tenant_context)
-            
-            user_info = {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "real_name": user.real_name,
-                "nickname": user.nickname,
-                "phone": user.phone,
-                "department": user.department,
-                "position": user.position,
-                "is_active": user.is_active,
-                "is_superuser": user.is_superuser,
-                "roles": [{"code": role, "name": role} for role in current_user.roles],
-                "permissions": list(current_user.permissions),
-                "language": user.language,
-                "timezone": user.timezone,
-                "theme": user.theme,
-                "last_login": user.last_login.isoformat() if user.last_login else None,
-                "created_at": user.created_at.isoformat() if user.created_at else None,
-            }
-            
-            return StandardResponse(
-                message="获取用户信息成功",
-                data=user_info
-            )
-            
-        except Exception as e:
+        current_user: UserDep,
+        tenant_context: TenantDep
+    ) -> MsgspecJSONResponse:
+        """获取当前用户信息（优先读取登录时写入的缓存）"""
+        redis = get_redis()
+        if redis is not None:
+            try:
+                cached = await redis.get(user_info_key(tenant_context.tenant_id, current_user.user_id))
+            except Exception as e:
+                logger.warning(f"读取用户信息缓存失败: {e}")
+                cached = None
+            if cached is not None:
+                return MsgspecJSONResponse(AuthResponse(
+                    message="获取用户信息成功",
+                    data=msgspec.Raw(cached)
+                ))
+        
+        user = await self.user_service.aget_by_id(current_user.user_id, tenant_context)
+        if not user:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="获取用户信息失败"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="用户不存在"
             )
+        
+        auth_data = await permission_cache.get_roles_and_perms(
+            user.id,
+            tenant_context.tenant_id,
+            lambda: self.user_service.aload_roles_and_permissions(user.id, tenant_context),
+        )
+        user_info = self._build_user_info(user, auth_data["roles"], auth_data["permissions"])
+        await self._cache_user_info(user_info, tenant_context.tenant_id)
+        
+        return MsgspecJSONResponse(AuthResponse(
+            message="获取用户信息成功",
+            data=user_info
+        ))
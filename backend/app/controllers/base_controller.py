@@ -4,17 +4,24 @@
 """
 
 import logging
-from typing import Type, TypeVar, Generic, Dict, Any, List, Optional
-from abc import ABC, abstractmethod
+import sys
+from typing import Type, TypeVar, Generic, Callable, Dict, Any, List, Optional, Tuple
+from abc import ABC
+from datetime import date
+from functools import cached_property, lru_cache, partial
+from operator import attrgetter
+from types import MappingProxyType
 
-from fastapi import HTTPException, status, Query, Path, Depends
+import anyio
+import orjson
+
+from fastapi import Query, Path, Depends, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel as PydanticBaseModel
 
 from ..services.base_service import BaseService
 from ..models.base import BaseModel
-from ..core.dependencies import TenantContext, PaginationParams, FilterParams, get_tenant_context
-from ..core.security import CurrentUser, get_current_user
-from ..core.exceptions import BusinessLogicError, ValidationError, NotFoundError
+from ..core.dependencies import TenantContext, TenantDep, UserDep, PaginationParams, FilterParams
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +29,31 @@ T = TypeVar('T', bound=BaseModel)
 S = TypeVar('S', bound=BaseService)
 
 
+@lru_cache(maxsize=None)
+def _path(fmt: str, name: str) -> str:
+    """生成路由路径并驻留，相同资源的路径字符串在各控制器间共享"""
+    return sys.intern(fmt % name)
+
+
+@lru_cache(maxsize=None)
+def _compile_serializer(fields: Tuple[str, ...]) -> Callable[[Any], Dict[str, Any]]:
+    """按字段生成专用序列化函数（字典字面量内联属性访问），相同字段集共享"""
+    for field in fields:
+        if not field.isidentifier():
+            raise ValueError(f"无效的响应字段: {field}")
+    items = ", ".join(f"{field!r}: obj.{field}" for field in fields)
+    namespace: Dict[str, Any] = {}
+    exec(f"def _serialize(obj):\n    return {{{items}}}\n", namespace)
+    return namespace["_serialize"]
+
+
+def _csv_cell(value: Any) -> str:
+    """CSV单元格文本：日期时间按ISO-8601输出，其余按str()输出"""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
 class StandardResponse(PydanticBaseModel):
     """标准响应模型"""
     success: bool = True
@@ -41,186 +73,180 @@ class PaginatedResponse(PydanticBaseModel):
 class BaseController(Generic[T, S], ABC):
     """基础控制器类"""
     
+    # 响应字段（子类声明），同时作为导出表头
+    RESPONSE_FIELDS: Tuple[str, ...] = ()
+    # 搜索字段（子类声明）
+    SEARCH_FIELDS: Tuple[str, ...] = ()
+    # 过滤条件规格：(过滤参数名, 数据库字段, 操作符)，操作符为None表示等值过滤
+    FILTER_SPEC: Tuple[Tuple[str, str, Optional[str]], ...] = (
+        ('status', 'status', None),
+        ('created_by', 'created_by', None),
+        ('date_from', 'created_at', 'gte'),
+        ('date_to', 'created_at', 'lte'),
+    )
+    
     def __init__(self, service: S):
         self.service = service
     
-    @abstractmethod
+    @cached_property
+    def _row_getter(self):
+        """按 RESPONSE_FIELDS 顺序一次取出对象属性元组"""
+        if len(self.RESPONSE_FIELDS) == 1:
+            field = self.RESPONSE_FIELDS[0]
+            return lambda obj: (getattr(obj, field),)
+        return attrgetter(*self.RESPONSE_FIELDS)
+    
+    @cached_property
+    def _serializer(self) -> Callable[[Any], Dict[str, Any]]:
+        """按 RESPONSE_FIELDS 生成的序列化函数"""
+        return _compile_serializer(tuple(self.RESPONSE_FIELDS))
+    
     def _to_response_model(self, obj: T) -> Dict[str, Any]:
         """将数据库对象转换为响应模型"""
-        pass
+        return self._serializer(obj)
     
-    @abstractmethod
-    def _get_search_fields(self) -> List[str]:
-        """获取搜索字段列表"""
-        pass
+    @staticmethod
+    def _json_response(message: str, data: Any = None) -> ORJSONResponse:
+        """直接序列化标准响应（路由声明 response_model=None，跳过响应模型二次校验）"""
+        return ORJSONResponse(StandardResponse(message=message, data=data).model_dump())
+    
+    def _json_list_response(self, message: str, objects: List[T]) -> Response:
+        """列表响应：orjson在C层遍历对象列表，通过 default 钩子逐个序列化，不构造中间字典列表"""
+        content = orjson.dumps(
+            {"success": True, "message": message, "data": objects, "error": None},
+            default=self._serializer
+        )
+        return Response(content=content, media_type="application/json")
+    
+    def _get_search_fields(self) -> Tuple[str, ...]:
+        """获取搜索字段（类级常量元组，保持顺序以生成稳定的SQL）"""
+        return self.SEARCH_FIELDS
+    
+    def _build_filters(self, filters: FilterParams) -> Dict[str, Any]:
+        """按 FILTER_SPEC 构建过滤条件（同一字段仅保留先出现的条件）"""
+        filter_dict = {}
+        for name, column, operator in self.FILTER_SPEC:
+            value = getattr(filters, name)
+            if not value or column in filter_dict:
+                continue
+            filter_dict[column] = value if operator is None else {'operator': operator, 'value': value}
+        return filter_dict
     
     def _to_response_list(self, objects: List[T]) -> List[Dict[str, Any]]:
         """将对象列表转换为响应模型列表"""
-        return [self._to_response_model(obj) for obj in objects]
-    
-    def _handle_service_error(self, e: Exception) -> HTTPException:
-        """处理服务层异常"""
-        if isinstance(e, NotFoundError):
-            return HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=e.message
-            )
-        elif isinstance(e, ValidationError):
-            return HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=e.message
-            )
-        elif isinstance(e, BusinessLogicError):
-            return HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=e.message
-            )
-        else:
-            logger.error(f"未处理的服务异常: {e}")
-            return HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="内部服务器错误"
-            )
+        serialize = self._serializer
+        return [serialize(obj) for obj in objects]
     
     async def create_item(
         self,
         data: Dict[str, Any],
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """创建记录"""
-        try:
-            obj = self.service.create(data, tenant_context, current_user.user_id)
-            response_data = self._to_response_model(obj)
-            
-            return StandardResponse(
-                message="创建成功",
-                data=response_data
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        obj = await anyio.to_thread.run_sync(
+            self.service.create, data, tenant_context, current_user.user_id
+        )
+        response_data = self._to_response_model(obj)
+        
+        return StandardResponse(
+            message="创建成功",
+            data=response_data
+        )
     
     async def get_item_by_id(
         self,
         item_id: str = Path(..., description="记录ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """根据ID获取记录"""
-        try:
-            obj = self.service.get_by_id_or_404(item_id, tenant_context)
-            response_data = self._to_response_model(obj)
-            
-            return StandardResponse(
-                message="获取成功",
-                data=response_data
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        obj = await anyio.to_thread.run_sync(self.service.get_by_id_or_404, item_id, tenant_context)
+        response_data = self._to_response_model(obj)
+        
+        return StandardResponse(
+            message="获取成功",
+            data=response_data
+        )
     
     async def get_item_list(
         self,
         pagination: PaginationParams = Depends(PaginationParams),
         filters: FilterParams = Depends(FilterParams),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> PaginatedResponse:
         """获取记录列表"""
-        try:
-            # 构建过滤条件
-            filter_dict = {}
-            if filters.status:
-                filter_dict['status'] = filters.status
-            if filters.created_by:
-                filter_dict['created_by'] = filters.created_by
-            if filters.date_from:
-                filter_dict['created_at'] = {'operator': 'gte', 'value': filters.date_from}
-            if filters.date_to:
-                if 'created_at' in filter_dict:
-                    # 如果已有created_at过滤，需要使用AND条件
-                    pass  # 这里简化处理，实际需要更复杂的逻辑
-                else:
-                    filter_dict['created_at'] = {'operator': 'lte', 'value': filters.date_to}
-            
-            result = self.service.get_list(
-                tenant_context=tenant_context,
-                filters=filter_dict,
-                search=filters.search,
-                search_fields=self._get_search_fields(),
-                sort_by=pagination.sort_by,
-                sort_order=pagination.sort_order,
-                page=pagination.page,
-                size=pagination.size
-            )
-            
-            response_data = self._to_response_list(result['records'])
-            
-            return PaginatedResponse(
-                message="获取成功",
-                data=response_data,
-                pagination=result['pagination']
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        result = await anyio.to_thread.run_sync(partial(
+            self.service.get_list,
+            tenant_context=tenant_context,
+            filters=self._build_filters(filters),
+            search=filters.search,
+            search_fields=self._get_search_fields(),
+            sort_by=pagination.sort_by,
+            sort_order=pagination.sort_order,
+            page=pagination.page,
+            size=pagination.size
+        ))
+        
+        response_data = self._to_response_list(result['records'])
+        
+        return PaginatedResponse(
+            message="获取成功",
+            data=response_data,
+            pagination=result['pagination']
+        )
     
     async def update_item(
         self,
         item_id: str,
         data: Dict[str, Any],
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """更新记录"""
-        try:
-            obj = self.service.update(item_id, data, tenant_context, current_user.user_id)
-            response_data = self._to_response_model(obj)
-            
-            return StandardResponse(
-                message="更新成功",
-                data=response_data
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        obj = await anyio.to_thread.run_sync(
+            self.service.update, item_id, data, tenant_context, current_user.user_id
+        )
+        response_data = self._to_response_model(obj)
+        
+        return StandardResponse(
+            message="更新成功",
+            data=response_data
+        )
     
     async def delete_item(
         self,
         item_id: str = Path(..., description="记录ID"),
         permanent: bool = Query(False, description="是否永久删除"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """删除记录"""
-        try:
-            soft_delete = not permanent
-            self.service.delete(item_id, tenant_context, soft_delete, current_user.user_id)
-            
-            return StandardResponse(
-                message="删除成功"
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        soft_delete = not permanent
+        await anyio.to_thread.run_sync(
+            self.service.delete, item_id, tenant_context, soft_delete, current_user.user_id
+        )
+        
+        return StandardResponse(
+            message="删除成功"
+        )
     
     async def get_statistics(
         self,
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """获取统计信息"""
-        try:
-            stats = self.service.get_statistics(tenant_context)
-            
-            return StandardResponse(
-                message="获取统计信息成功",
-                data=stats
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        stats = await anyio.to_thread.run_sync(self.service.get_statistics, tenant_context)
+        
+        return StandardResponse(
+            message="获取统计信息成功",
+            data=stats
+        )
 
 
 class CRUDController(BaseController[T, S]):
@@ -230,52 +256,53 @@ class CRUDController(BaseController[T, S]):
         super().__init__(service)
         self.resource_name = resource_name
     
-    def create_routes(self) -> List[Dict[str, Any]]:
-        """创建路由配置"""
-        return [
+    @cached_property
+    def routes(self) -> Tuple[MappingProxyType, ...]:
+        """路由配置（实例内只生成一次，只读）"""
+        return tuple(MappingProxyType(route) for route in [
             {
-                "path": f"/{self.resource_name}",
+                "path": _path("/%s", self.resource_name),
                 "method": "POST",
                 "endpoint": self.create_item,
                 "summary": f"创建{self.resource_name}",
                 "response_model": StandardResponse
             },
             {
-                "path": f"/{self.resource_name}/{{item_id}}",
+                "path": _path("/%s/{item_id}", self.resource_name),
                 "method": "GET",
                 "endpoint": self.get_item_by_id,
                 "summary": f"获取{self.resource_name}详情",
                 "response_model": StandardResponse
             },
             {
-                "path": f"/{self.resource_name}",
+                "path": _path("/%s", self.resource_name),
                 "method": "GET", 
                 "endpoint": self.get_item_list,
                 "summary": f"获取{self.resource_name}列表",
                 "response_model": PaginatedResponse
             },
             {
-                "path": f"/{self.resource_name}/{{item_id}}",
+                "path": _path("/%s/{item_id}", self.resource_name),
                 "method": "PUT",
                 "endpoint": self.update_item,
                 "summary": f"更新{self.resource_name}",
                 "response_model": StandardResponse
             },
             {
-                "path": f"/{self.resource_name}/{{item_id}}",
+                "path": _path("/%s/{item_id}", self.resource_name),
                 "method": "DELETE",
                 "endpoint": self.delete_item,
                 "summary": f"删除{self.resource_name}",
                 "response_model": StandardResponse
             },
             {
-                "path": f"/{self.resource_name}/statistics",
+                "path": _path("/%s/statistics", self.resource_name),
                 "method": "GET",
                 "endpoint": self.get_statistics,
                 "summary": f"获取{self.resource_name}统计信息",
                 "response_model": StandardResponse
             }
-        ]
+        ])
 
 
 class ReadOnlyController(BaseController[T, S]):
@@ -285,31 +312,32 @@ class ReadOnlyController(BaseController[T, S]):
         super().__init__(service)
         self.resource_name = resource_name
     
-    def create_routes(self) -> List[Dict[str, Any]]:
-        """创建路由配置"""
-        return [
+    @cached_property
+    def routes(self) -> Tuple[MappingProxyType, ...]:
+        """路由配置（实例内只生成一次，只读）"""
+        return tuple(MappingProxyType(route) for route in [
             {
-                "path": f"/{self.resource_name}/{{item_id}}",
+                "path": _path("/%s/{item_id}", self.resource_name),
                 "method": "GET",
                 "endpoint": self.get_item_by_id,
                 "summary": f"获取{self.resource_name}详情",
                 "response_model": StandardResponse
             },
             {
-                "path": f"/{self.resource_name}",
+                "path": _path("/%s", self.resource_name),
                 "method": "GET",
                 "endpoint": self.get_item_list,
                 "summary": f"获取{self.resource_name}列表",
                 "response_model": PaginatedResponse
             },
             {
-                "path": f"/{self.resource_name}/statistics",
+                "path": _path("/%s/statistics", self.resource_name),
                 "method": "GET",
                 "endpoint": self.get_statistics,
                 "summary": f"获取{self.resource_name}统计信息",
                 "response_model": StandardResponse
             }
-        ]
+        ])
 
 
 class BatchController(BaseController[T, S]):
@@ -318,214 +346,195 @@ class BatchController(BaseController[T, S]):
     async def batch_create(
         self,
         data_list: List[Dict[str, Any]],
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """批量创建记录"""
-        try:
-            created_objects = []
-            
-            for data in data_list:
-                obj = self.service.create(data, tenant_context, current_user.user_id)
-                created_objects.append(obj)
-            
-            response_data = self._to_response_list(created_objects)
-            
-            return StandardResponse(
-                message=f"批量创建成功，共创建{len(created_objects)}条记录",
-                data=response_data
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        created_objects = await anyio.to_thread.run_sync(
+            self.service.bulk_create, data_list, tenant_context, current_user.user_id
+        )
+        
+        response_data = self._to_response_list(created_objects)
+        
+        return StandardResponse(
+            message=f"批量创建成功，共创建{len(created_objects)}条记录",
+            data=response_data
+        )
     
     async def batch_update(
         self,
         updates: List[Dict[str, Any]],  # [{"id": "xxx", "data": {...}}, ...]
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """批量更新记录"""
-        try:
-            updated_objects = []
-            
-            for update in updates:
-                obj = self.service.update(
-                    update['id'], 
-                    update['data'], 
-                    tenant_context, 
-                    current_user.user_id
-                )
-                updated_objects.append(obj)
-            
-            response_data = self._to_response_list(updated_objects)
-            
-            return StandardResponse(
-                message=f"批量更新成功，共更新{len(updated_objects)}条记录",
-                data=response_data
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        updated_objects = await anyio.to_thread.run_sync(
+            self.service.bulk_update, updates, tenant_context, current_user.user_id
+        )
+        
+        response_data = self._to_response_list(updated_objects)
+        
+        return StandardResponse(
+            message=f"批量更新成功，共更新{len(updated_objects)}条记录",
+            data=response_data
+        )
     
     async def batch_delete(
         self,
         item_ids: List[str],
         permanent: bool = Query(False, description="是否永久删除"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """批量删除记录"""
-        try:
-            deleted_count = 0
-            soft_delete = not permanent
-            
-            for item_id in item_ids:
-                if self.service.delete(item_id, tenant_context, soft_delete, current_user.user_id):
-                    deleted_count += 1
-            
-            return StandardResponse(
-                message=f"批量删除成功，共删除{deleted_count}条记录"
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        soft_delete = not permanent
+        deleted_count = await anyio.to_thread.run_sync(
+            self.service.bulk_delete, item_ids, tenant_context, soft_delete, current_user.user_id
+        )
+        
+        return StandardResponse(
+            message=f"批量删除成功，共删除{deleted_count}条记录"
+        )
     
-    def create_batch_routes(self) -> List[Dict[str, Any]]:
-        """创建批量操作路由配置"""
-        return [
+    @cached_property
+    def batch_routes(self) -> Tuple[MappingProxyType, ...]:
+        """批量操作路由配置（实例内只生成一次，只读）"""
+        return tuple(MappingProxyType(route) for route in [
             {
-                "path": f"/{self.resource_name}/batch",
+                "path": _path("/%s/batch", self.resource_name),
                 "method": "POST",
                 "endpoint": self.batch_create,
                 "summary": f"批量创建{self.resource_name}",
                 "response_model": StandardResponse
             },
             {
-                "path": f"/{self.resource_name}/batch",
+                "path": _path("/%s/batch", self.resource_name),
                 "method": "PUT",
                 "endpoint": self.batch_update,
                 "summary": f"批量更新{self.resource_name}",
                 "response_model": StandardResponse
             },
             {
-                "path": f"/{self.resource_name}/batch",
+                "path": _path("/%s/batch", self.resource_name),
                 "method": "DELETE",
                 "endpoint": self.batch_delete,
                 "summary": f"批量删除{self.resource_name}",
                 "response_model": StandardResponse
             }
-        ]
+        ])
 
 
 class ExportController(BaseController[T, S]):
     """导出控制器基类"""
     
+    async def _aiter_records(self, filters: FilterParams, tenant_context: TenantContext):
+        """在线程池中分批读取待导出记录"""
+        batches = self.service.iter_list(
+            tenant_context=tenant_context,
+            filters=self._build_filters(filters),
+            search=filters.search,
+            search_fields=self._get_search_fields()
+        )
+        
+        try:
+            while True:
+                batch = await anyio.to_thread.run_sync(next, batches, None)
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            await anyio.to_thread.run_sync(batches.close)
+    
     async def export_csv(
         self,
         filters: FilterParams = Depends(FilterParams),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
     ):
-        """导出CSV格式"""
+        """导出CSV格式（逐批流式输出）"""
         from fastapi.responses import StreamingResponse
         import csv
         import io
         
-        try:
-            # 获取所有数据（不分页）
-            result = self.service.get_list(
-                tenant_context=tenant_context,
-                filters=filters.to_dict(),
-                search=filters.search,
-                search_fields=self._get_search_fields(),
-                page=1,
-                size=10000  # 设置一个较大的限制
-            )
-            
-            # 生成CSV数据
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # 写入表头
-            if result['records']:
-                headers = list(self._to_response_model(result['records'][0]).keys())
-                writer.writerow(headers)
-                
-                # 写入数据行
-                for record in result['records']:
-                    row_data = self._to_response_model(record)
-                    writer.writerow([str(row_data.get(h, '')) for h in headers])
-            
-            output.seek(0)
-            
-            return StreamingResponse(
-                io.BytesIO(output.getvalue().encode('utf-8-sig')),
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename={self.resource_name}.csv"}
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        getter = self._row_getter
+        
+        async def _csv_iter():
+            # BOM和表头
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            buffer.write('\ufeff')
+            writer.writerow(self.RESPONSE_FIELDS)
+            yield buffer.getvalue().encode('utf-8')
+            
+            async for records in self._aiter_records(filters, tenant_context):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([_csv_cell(value) for value in getter(record)] for record in records)
+                yield buffer.getvalue().encode('utf-8')
+        
+        return StreamingResponse(
+            _csv_iter(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={self.resource_name}.csv"}
+        )
     
     async def export_excel(
         self,
         filters: FilterParams = Depends(FilterParams),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
     ):
-        """导出Excel格式"""
+        """导出Excel格式（xlsxwriter常量内存模式）"""
         from fastapi.responses import StreamingResponse
-        import pandas as pd
         import io
+        import xlsxwriter
         
-        try:
-            # 获取所有数据
-            result = self.service.get_list(
-                tenant_context=tenant_context,
-                filters=filters.to_dict(),
-                search=filters.search,
-                search_fields=self._get_search_fields(),
-                page=1,
-                size=10000
-            )
-            
-            # 转换为DataFrame
-            if result['records']:
-                data = [self._to_response_model(record) for record in result['records']]
-                df = pd.DataFrame(data)
-            else:
-                df = pd.DataFrame()
-            
-            # 生成Excel文件
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name=self.resource_name)
-            
-            output.seek(0)
-            
-            return StreamingResponse(
-                output,
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={"Content-Disposition": f"attachment; filename={self.resource_name}.xlsx"}
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        output = io.BytesIO()
+        # constant_memory：逐行写入临时文件，内存占用与行数无关
+        workbook = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+            'remove_timezone': True,
+        })
+        worksheet = workbook.add_worksheet(self.resource_name)
+        worksheet.write_row(0, 0, self.RESPONSE_FIELDS)
+        
+        getter = self._row_getter
+        row_index = 1
+        async for records in self._aiter_records(filters, tenant_context):
+            for record in records:
+                worksheet.write_row(row_index, 0, [
+                    str(value) if isinstance(value, (dict, list)) else value
+                    for value in getter(record)
+                ])
+                row_index += 1
+        
+        await anyio.to_thread.run_sync(workbook.close)
+        output.seek(0)
+        
+        return StreamingResponse(
+            output,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": f"attachment; filename={self.resource_name}.xlsx"}
+        )
     
-    def create_export_routes(self) -> List[Dict[str, Any]]:
-        """创建导出路由配置"""
-        return [
+    @cached_property
+    def export_routes(self) -> Tuple[MappingProxyType, ...]:
+        """导出路由配置（实例内只生成一次，只读）"""
+        return tuple(MappingProxyType(route) for route in [
             {
-                "path": f"/{self.resource_name}/export/csv",
+                "path": _path("/%s/export/csv", self.resource_name),
                 "method": "GET",
                 "endpoint": self.export_csv,
                 "summary": f"导出{self.resource_name}为CSV格式"
             },
             {
-                "path": f"/{self.resource_name}/export/excel",
+                "path": _path("/%s/export/excel", self.resource_name),
                 "method": "GET",
                 "endpoint": self.export_excel,
                 "summary": f"导出{self.resource_name}为Excel格式"
             }
-        ]
+        ])
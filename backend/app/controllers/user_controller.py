@@ -3,17 +3,47 @@
 提供用户相关的API接口
 """
 
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
 
-from fastapi import Depends, HTTPException, status, Query, Path, Body
+import anyio
+from fastapi import Depends, HTTPException, status, Query, Path, Body, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, EmailStr
 
 from .base_controller import CRUDController, BatchController, ExportController, StandardResponse
 from ..services.user_service import UserService
-from ..models.user import User, Role
-from ..core.dependencies import TenantContext, get_tenant_context
-from ..core.security import CurrentUser, get_current_user, require_permission, require_role
+from ..models.user import User
+from ..core.dependencies import TenantDep, UserDep
+from ..core.security import MAX_PASSWORD_LENGTH, CurrentUser, require_permission
+
+
+# 权限依赖（模块级常量，各路由共用同一依赖对象，便于FastAPI按请求缓存）
+_DEP_USER_CREATE = Depends(require_permission("user:create"))
+_DEP_USER_UPDATE = Depends(require_permission("user:update"))
+_DEP_USER_MANAGE = Depends(require_permission("user:manage"))
+_DEP_USER_READ = Depends(require_permission("user:read"))
+
+
+@lru_cache(maxsize=None)
+def _compile_diff_set(fields: Tuple[str, ...]) -> Callable[[BaseModel], Dict[str, Any]]:
+    """生成只收集非None字段的函数（逐字段内联判断，不构造完整字典）"""
+    lines = ["def diff_set(self):", "    d = {}"]
+    for field in fields:
+        lines.append(f"    v = self.{field}")
+        lines.append("    if v is not None:")
+        lines.append(f"        d[{field!r}] = v")
+    lines.append("    return d")
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["diff_set"]
+
+
+def partial_update_model(cls):
+    """为部分更新请求模型生成 diff_set() 方法，返回已设置（非None）的字段"""
+    cls.diff_set = _compile_diff_set(tuple(cls.model_fields))
+    return cls
 
 
 # Pydantic模型定义
@@ -21,33 +51,40 @@ class UserCreateRequest(BaseModel):
     """创建用户请求模型"""
     username: str = Field(..., min_length=3, max_length=50, description="用户名")
     email: EmailStr = Field(..., description="邮箱地址")
-    password: str = Field(..., min_length=8, description="密码")
-    real_name: str = Field(None, max_length=100, description="真实姓名")
-    phone: str = Field(None, max_length=20, description="手机号")
-    department: str = Field(None, max_length=100, description="部门")
-    position: str = Field(None, max_length=100, description="职位")
+    password: str = Field(..., min_length=8, max_length=MAX_PASSWORD_LENGTH, description="密码")
+    real_name: Optional[str] = Field(None, max_length=100, description="真实姓名")
+    phone: Optional[str] = Field(None, max_length=20, description="手机号")
+    department: Optional[str] = Field(None, max_length=100, description="部门")
+    position: Optional[str] = Field(None, max_length=100, description="职位")
     is_active: bool = Field(True, description="是否激活")
 
 
+@partial_update_model
 class UserUpdateRequest(BaseModel):
     """更新用户请求模型"""
-    email: EmailStr = Field(None, description="邮箱地址")
-    real_name: str = Field(None, max_length=100, description="真实姓名")
-    phone: str = Field(None, max_length=20, description="手机号")
-    department: str = Field(None, max_length=100, description="部门")
-    position: str = Field(None, max_length=100, description="职位")
-    is_active: bool = Field(None, description="是否激活")
+    email: Optional[EmailStr] = Field(None, description="邮箱地址")
+    real_name: Optional[str] = Field(None, max_length=100, description="真实姓名")
+    phone: Optional[str] = Field(None, max_length=20, description="手机号")
+    department: Optional[str] = Field(None, max_length=100, description="部门")
+    position: Optional[str] = Field(None, max_length=100, description="职位")
+    is_active: Optional[bool] = Field(None, description="是否激活")
+
+
+# 个人信息更新：普通用户不能修改自己的激活状态
+_self_update_diff_set = _compile_diff_set(
+    tuple(field for field in UserUpdateRequest.model_fields if field != "is_active")
+)
 
 
 class PasswordChangeRequest(BaseModel):
     """修改密码请求模型"""
-    old_password: str = Field(..., description="原密码")
-    new_password: str = Field(..., min_length=8, description="新密码")
+    old_password: str = Field(..., max_length=MAX_PASSWORD_LENGTH, description="原密码")
+    new_password: str = Field(..., min_length=8, max_length=MAX_PASSWORD_LENGTH, description="新密码")
 
 
 class PasswordResetRequest(BaseModel):
     """重置密码请求模型"""
-    new_password: str = Field(..., min_length=8, description="新密码")
+    new_password: str = Field(..., min_length=8, max_length=MAX_PASSWORD_LENGTH, description="新密码")
 
 
 class RoleAssignRequest(BaseModel):
@@ -76,412 +113,319 @@ class UserResponse(BaseModel):
 class UserController(CRUDController[User, UserService], BatchController, ExportController):
     """用户控制器"""
     
+    RESPONSE_FIELDS = (
+        "id", "username", "email", "real_name", "nickname", "phone", "gender",
+        "department", "position", "employee_id", "is_active", "is_superuser", "is_staff",
+        "last_login", "login_count", "failed_login_count", "locked_until",
+        "language", "timezone", "theme", "created_at", "updated_at",
+    )
+    SEARCH_FIELDS = ("username", "real_name", "email", "phone", "department", "position")
+    
     def __init__(self):
         super().__init__(UserService(), "users")
     
-    def _to_response_model(self, obj: User) -> Dict[str, Any]:
-        """将用户对象转换为响应模型"""
-        return {
-            "id": obj.id,
-            "username": obj.username,
-            "email": obj.email,
-            "real_name": obj.real_name,
-            "nickname": obj.nickname,
-            "phone": obj.phone,
-            "gender": obj.gender,
-            "department": obj.department,
-            "position": obj.position,
-            "employee_id": obj.employee_id,
-            "is_active": obj.is_active,
-            "is_superuser": obj.is_superuser,
-            "is_staff": obj.is_staff,
-            "last_login": obj.last_login.isoformat() if obj.last_login else None,
-            "login_count": obj.login_count,
-            "failed_login_count": obj.failed_login_count,
-            "locked_until": obj.locked_until.isoformat() if obj.locked_until else None,
-            "language": obj.language,
-            "timezone": obj.timezone,
-            "theme": obj.theme,
-            "created_at": obj.created_at.isoformat() if obj.created_at else None,
-            "updated_at": obj.updated_at.isoformat() if obj.updated_at else None,
-        }
-    
-    def _get_search_fields(self) -> List[str]:
-        """获取搜索字段列表"""
-        return ["username", "real_name", "email", "phone", "department", "position"]
-    
     async def create_user(
         self,
         user_data: UserCreateRequest,
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:create"))
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_CREATE
     ) -> StandardResponse:
         """创建用户"""
-        return await self.create_item(user_data.dict(), tenant_context, current_user)
+        return await self.create_item(user_data.model_dump(), tenant_context, current_user)
     
     async def update_user(
         self,
         user_id: str = Path(..., description="用户ID"),
         user_data: UserUpdateRequest = Body(...),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:update"))
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_UPDATE
     ) -> StandardResponse:
         """更新用户"""
         # 过滤掉None值
-        update_data = {k: v for k, v in user_data.dict().items() if v is not None}
+        update_data = user_data.diff_set()
         return await self.update_item(user_id, update_data, tenant_context, current_user)
     
     async def change_password(
         self,
         user_id: str = Path(..., description="用户ID"),
         password_data: PasswordChangeRequest = Body(...),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """修改密码"""
-        try:
-            # 只能修改自己的密码，除非有管理权限
-            if user_id != current_user.user_id and not current_user.has_permission("user:manage"):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="无权修改其他用户的密码"
-                )
-            
-            success = self.service.change_password(
-                user_id,
-                password_data.old_password,
-                password_data.new_password,
-                tenant_context
+        # 只能修改自己的密码，除非有管理权限
+        if user_id != current_user.user_id and not current_user.has_permission("user:manage"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="无权修改其他用户的密码"
+            )
+        
+        success = await anyio.to_thread.run_sync(
+            self.service.change_password,
+            user_id,
+            password_data.old_password,
+            password_data.new_password,
+            tenant_context
+        )
+        
+        if success:
+            return StandardResponse(message="密码修改成功")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="密码修改失败"
             )
-            
-            if success:
-                return StandardResponse(message="密码修改成功")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="密码修改失败"
-                )
-                
-        except Exception as e:
-            raise self._handle_service_error(e)
     
     async def reset_password(
         self,
         user_id: str = Path(..., description="用户ID"),
         password_data: PasswordResetRequest = Body(...),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:manage"))
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_MANAGE
     ) -> StandardResponse:
         """重置密码（管理员操作）"""
-        try:
-            success = self.service.reset_password(
-                user_id,
-                password_data.new_password,
-                tenant_context,
-                current_user.user_id
+        success = await anyio.to_thread.run_sync(
+            self.service.reset_password,
+            user_id,
+            password_data.new_password,
+            tenant_context,
+            current_user.user_id
+        )
+        
+        if success:
+            return StandardResponse(message="密码重置成功")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="密码重置失败"
             )
-            
-            if success:
-                return StandardResponse(message="密码重置成功")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="密码重置失败"
-                )
-                
-        except Exception as e:
-            raise self._handle_service_error(e)
     
     async def lock_user(
         self,
         user_id: str = Path(..., description="用户ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:manage"))
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_MANAGE
     ) -> StandardResponse:
         """锁定用户"""
-        try:
-            success = self.service.lock_user(user_id, tenant_context, current_user.user_id)
-            
-            if success:
-                return StandardResponse(message="用户锁定成功")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="用户锁定失败"
-                )
-                
-        except Exception as e:
-            raise self._handle_service_error(e)
+        success = await anyio.to_thread.run_sync(self.service.lock_user, user_id, tenant_context, current_user.user_id)
+        
+        if success:
+            return StandardResponse(message="用户锁定成功")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="用户锁定失败"
+            )
     
     async def unlock_user(
         self,
         user_id: str = Path(..., description="用户ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:manage"))
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_MANAGE
     ) -> StandardResponse:
         """解锁用户"""
-        try:
-            success = self.service.unlock_user(user_id, tenant_context, current_user.user_id)
-            
-            if success:
-                return StandardResponse(message="用户解锁成功")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="用户解锁失败"
-                )
-                
-        except Exception as e:
-            raise self._handle_service_error(e)
+        success = await anyio.to_thread.run_sync(self.service.unlock_user, user_id, tenant_context, current_user.user_id)
+        
+        if success:
+            return StandardResponse(message="用户解锁成功")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="用户解锁失败"
+            )
     
     async def activate_user(
         self,
         user_id: str = Path(..., description="用户ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:manage"))
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_MANAGE
     ) -> StandardResponse:
         """激活用户"""
-        try:
-            success = self.service.activate_user(user_id, tenant_context, current_user.user_id)
-            
-            if success:
-                return StandardResponse(message="用户激活成功")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="用户激活失败"
-                )
-                
-        except Exception as e:
-            raise self._handle_service_error(e)
+        success = await anyio.to_thread.run_sync(self.service.activate_user, user_id, tenant_context, current_user.user_id)
+        
+        if success:
+            return StandardResponse(message="用户激活成功")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="用户激活失败"
+            )
     
     async def deactivate_user(
         self,
         user_id: str = Path(..., description="用户ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:manage"))
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_MANAGE
     ) -> StandardResponse:
         """停用用户"""
-        try:
-            success = self.service.deactivate_user(user_id, tenant_context, current_user.user_id)
-            
-            if success:
-                return StandardResponse(message="用户停用成功")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="用户停用失败"
-                )
-                
-        except Exception as e:
-            raise self._handle_service_error(e)
+        success = await anyio.to_thread.run_sync(self.service.deactivate_user, user_id, tenant_context, current_user.user_id)
+        
+        if success:
+            return StandardResponse(message="用户停用成功")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="用户停用失败"
+            )
     
     async def get_user_roles(
         self,
         user_id: str = Path(..., description="用户ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
-    ) -> StandardResponse:
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
+    ) -> ORJSONResponse:
         """获取用户角色列表"""
-        try:
-            # 只能查看自己的角色，除非有管理权限
-            if user_id != current_user.user_id and not current_user.has_permission("user:read"):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="无权查看其他用户的角色"
-                )
-            
-            roles = self.service.get_user_roles(user_id, tenant_context)
-            
-            role_data = [
-                {
-                    "id": role.id,
-                    "name": role.name,
-                    "code": role.code,
-                    "description": role.description,
-                    "is_active": role.is_active,
-                    "is_system": role.is_system
-                }
-                for role in roles
-            ]
-            
-            return StandardResponse(
-                message="获取用户角色成功",
-                data=role_data
+        # 只能查看自己的角色，除非有管理权限
+        if user_id != current_user.user_id and not current_user.has_permission("user:read"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="无权查看其他用户的角色"
             )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        
+        role_data = await self.service.aget_user_role_rows(user_id, tenant_context)
+        
+        return self._json_response("获取用户角色成功", role_data)
     
     async def assign_roles(
         self,
         user_id: str = Path(..., description="用户ID"),
         role_data: RoleAssignRequest = Body(...),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:manage"))
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_MANAGE
     ) -> StandardResponse:
         """为用户分配角色"""
-        try:
-            success_count = 0
-            
-            for role_id in role_data.role_ids:
-                if self.service.assign_role(user_id, role_id, tenant_context, current_user.user_id):
-                    success_count += 1
-            
-            return StandardResponse(
-                message=f"角色分配成功，共分配{success_count}个角色"
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        success_count = await anyio.to_thread.run_sync(
+            self.service.assign_roles_bulk,
+            user_id,
+            role_data.role_ids,
+            tenant_context,
+            current_user.user_id
+        )
+        
+        return StandardResponse(
+            message=f"角色分配成功，共分配{success_count}个角色"
+        )
     
     async def remove_role(
         self,
         user_id: str = Path(..., description="用户ID"),
         role_id: str = Path(..., description="角色ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:manage"))
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_MANAGE
     ) -> StandardResponse:
         """移除用户角色"""
-        try:
-            success = self.service.remove_role(user_id, role_id, tenant_context)
-            
-            if success:
-                return StandardResponse(message="角色移除成功")
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="角色移除失败"
-                )
-                
-        except Exception as e:
-            raise self._handle_service_error(e)
+        success = await anyio.to_thread.run_sync(self.service.remove_role, user_id, role_id, tenant_context)
+        
+        if success:
+            return StandardResponse(message="角色移除成功")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="角色移除失败"
+            )
     
     async def get_user_permissions(
         self,
         user_id: str = Path(..., description="用户ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
-    ) -> StandardResponse:
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
+    ) -> ORJSONResponse:
         """获取用户权限列表"""
-        try:
-            # 只能查看自己的权限，除非有管理权限
-            if user_id != current_user.user_id and not current_user.has_permission("user:read"):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="无权查看其他用户的权限"
-                )
-            
-            permissions = self.service.get_user_permissions(user_id, tenant_context)
-            
-            return StandardResponse(
-                message="获取用户权限成功",
-                data=permissions
+        # 只能查看自己的权限，除非有管理权限
+        if user_id != current_user.user_id and not current_user.has_permission("user:read"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="无权查看其他用户的权限"
             )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        
+        permissions = await self.service.aget_user_permissions(user_id, tenant_context)
+        
+        return self._json_response("获取用户权限成功", permissions)
     
     async def search_users(
         self,
         keyword: str = Query(..., description="搜索关键词"),
         include_inactive: bool = Query(False, description="是否包含非活跃用户"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:read"))
-    ) -> StandardResponse:
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_READ
+    ) -> Response:
         """搜索用户"""
-        try:
-            users = self.service.search_users(keyword, tenant_context, include_inactive)
-            response_data = self._to_response_list(users)
-            
-            return StandardResponse(
-                message="搜索用户成功",
-                data=response_data
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        users = await anyio.to_thread.run_sync(self.service.search_users, keyword, tenant_context, include_inactive)
+        return self._json_list_response("搜索用户成功", users)
     
     async def get_users_by_role(
         self,
         role_code: str = Query(..., description="角色代码"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(require_permission("user:read"))
-    ) -> StandardResponse:
+        *,
+        tenant_context: TenantDep,
+        current_user: CurrentUser = _DEP_USER_READ
+    ) -> Response:
         """根据角色获取用户列表"""
-        try:
-            users = self.service.get_users_by_role(role_code, tenant_context)
-            response_data = self._to_response_list(users)
-            
-            return StandardResponse(
-                message="获取角色用户成功",
-                data=response_data
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        users = await anyio.to_thread.run_sync(self.service.get_users_by_role, role_code, tenant_context)
+        return self._json_list_response("获取角色用户成功", users)
     
     async def get_current_user_info(
         self,
-        current_user: CurrentUser = Depends(get_current_user),
-        tenant_context: TenantContext = Depends(get_tenant_context)
-    ) -> StandardResponse:
-        """获取当前用户信息"""
-        try:
-            user = self.service.get_by_id_or_404(current_user.user_id, tenant_context)
-            response_data = self._to_response_model(user)
-            
-            # 添加角色和权限信息
-            response_data["roles"] = [
-                {"code": role, "name": role}
-                for role in current_user.roles
-            ]
-            response_data["permissions"] = list(current_user.permissions)
-            
-            return StandardResponse(
-                message="获取当前用户信息成功",
-                data=response_data
-            )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        current_user: UserDep,
+        tenant_context: TenantDep
+    ) -> ORJSONResponse:
+        """获取当前用户信息（角色和权限取自令牌，仅需查询用户记录）"""
+        user = await self.service.aget_by_id_or_404(current_user.user_id, tenant_context)
+        response_data = self._to_response_model(user)
+        
+        # 添加角色和权限信息
+        response_data["roles"] = [
+            {"code": role, "name": role}
+            for role in sorted(current_user.roles)
+        ]
+        response_data["permissions"] = sorted(current_user.permissions)
+        
+        return self._json_response("获取当前用户信息成功", response_data)
     
     async def update_current_user_info(
         self,
         user_data: UserUpdateRequest = Body(...),
-        current_user: CurrentUser = Depends(get_current_user),
-        tenant_context: TenantContext = Depends(get_tenant_context)
+        *,
+        current_user: UserDep,
+        tenant_context: TenantDep
     ) -> StandardResponse:
         """更新当前用户信息"""
         # 过滤掉None值和敏感字段
-        update_data = {k: v for k, v in user_data.dict().items() if v is not None}
-        # 普通用户不能修改自己的激活状态
-        update_data.pop('is_active', None)
+        update_data = _self_update_diff_set(user_data)
         
         return await self.update_item(current_user.user_id, update_data, tenant_context, current_user)
     
     async def check_password_expiry(
         self,
         user_id: str = Path(..., description="用户ID"),
-        tenant_context: TenantContext = Depends(get_tenant_context),
-        current_user: CurrentUser = Depends(get_current_user)
+        *,
+        tenant_context: TenantDep,
+        current_user: UserDep
     ) -> StandardResponse:
         """检查密码是否过期"""
-        try:
-            # 只能检查自己的密码过期状态，除非有管理权限
-            if user_id != current_user.user_id and not current_user.has_permission("user:read"):
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="无权检查其他用户的密码状态"
-                )
-            
-            user = self.service.get_by_id_or_404(user_id, tenant_context)
-            password_info = self.service.check_password_expiry(user, tenant_context)
-            
-            return StandardResponse(
-                message="获取密码状态成功",
-                data=password_info
+        # 只能检查自己的密码过期状态，除非有管理权限
+        if user_id != current_user.user_id and not current_user.has_permission("user:read"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="无权检查其他用户的密码状态"
             )
-            
-        except Exception as e:
-            raise self._handle_service_error(e)
+        
+        user = await self.service.aget_by_id_or_404(user_id, tenant_context)
+        password_info = self.service.check_password_expiry(user, tenant_context)
+        
+        return StandardResponse(
+            message="获取密码状态成功",
+            data=password_info
+        )
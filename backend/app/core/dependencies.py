@@ -4,16 +4,27 @@
 """
 
 import logging
-from typing import Optional, Dict, Any
+from dataclasses import fields
+from functools import lru_cache
+from typing import Annotated, Literal, Optional, Dict, Any
+
 from fastapi import Depends, HTTPException, status, Query, Path
 
-from ..config.database import get_db, SessionLocal
-from ..config.tenant_config import get_tenant_config, TenantConfig
+from ..config.database import get_db, ScopedSession
+from ..config.tenant_config import aget_tenant_config, TenantConfig, TenantFeatureConfig
 from .security import get_current_user, CurrentUser
 
 logger = logging.getLogger(__name__)
 
 
+# 功能开关：(功能名, 配置字段名)，按 TenantFeatureConfig 的 enable_* 字段生成一次
+_FEATURE_FLAGS = tuple(
+    (field.name.removeprefix("enable_"), field.name)
+    for field in fields(TenantFeatureConfig)
+    if field.name.startswith("enable_")
+)
+
+
 class TenantContext:
     """租户上下文"""
     
@@ -27,19 +38,27 @@ class TenantContext:
         self.notifications = config.notifications
         self.security = config.security
         self.custom_settings = config.custom_settings
+        # 已启用功能集合，请求内检查为O(1)集合查找
+        self._enabled_features = frozenset(
+            name for name, attr in _FEATURE_FLAGS if getattr(self.features, attr)
+        )
     
     def has_feature(self, feature_name: str) -> bool:
         """检查是否启用某个功能"""
-        return getattr(self.features, f"enable_{feature_name}", False)
+        return feature_name in self._enabled_features
     
     def get_custom_setting(self, key: str, default: Any = None) -> Any:
         """获取自定义设置"""
         return self.custom_settings.get(key, default)
 
 
+# 当前用户依赖别名（全局唯一的依赖对象，同一请求内只解析一次）
+UserDep = Annotated[CurrentUser, Depends(get_current_user)]
+
+
 async def get_tenant_context(
+    current_user: UserDep,
     tenant_id: Optional[str] = Query(None, description="租户ID"),
-    current_user: CurrentUser = Depends(get_current_user),
 ) -> TenantContext:
     """获取租户上下文"""
     # 如果未提供租户ID，使用当前用户的租户ID
@@ -53,28 +72,24 @@ async def get_tenant_context(
             detail="无权访问其他租户的数据",
         )
     
-    try:
-        config = get_tenant_config(tenant_id)
-        if config is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"租户 {tenant_id} 不存在",
-            )
-        
-        if not config.active:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="租户账户已禁用",
-            )
-        
-        return TenantContext(tenant_id, config)
-        
-    except Exception as e:
-        logger.error(f"获取租户上下文失败: {e}")
+    config = await aget_tenant_config(tenant_id)
+    if config is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"租户 {tenant_id} 不存在",
+        )
+    
+    if not config.active:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="获取租户信息失败",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="租户账户已禁用",
         )
+    
+    return TenantContext(tenant_id, config)
+
+
+# 租户上下文依赖别名
+TenantDep = Annotated[TenantContext, Depends(get_tenant_context)]
 
 
 class PaginationParams:
@@ -85,18 +100,15 @@ class PaginationParams:
         page: int = Query(1, ge=1, description="页码"),
         size: int = Query(20, ge=1, le=100, description="每页数量"),
         sort_by: Optional[str] = Query(None, description="排序字段"),
-        sort_order: str = Query("asc", regex="^(asc|desc)$", description="排序方向"),
+        sort_order: Literal["asc", "desc"] = Query("asc", description="排序方向"),
     ):
         self.page = page
         self.size = size
         self.sort_by = sort_by
         self.sort_order = sort_order
         self.offset = (page - 1) * size
-    
-    @property
-    def is_desc(self) -> bool:
-        """是否降序"""
-        return self.sort_order.lower() == "desc"
+        # 是否降序
+        self.is_desc = sort_order == "desc"
 
 
 def get_pagination_params() -> PaginationParams:
@@ -122,16 +134,19 @@ class FilterParams:
         self.created_by = created_by
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return {
-            k: v for k, v in {
-                "search": self.search,
-                "status": self.status,
-                "date_from": self.date_from,
-                "date_to": self.date_to,
-                "created_by": self.created_by,
-            }.items() if v is not None
-        }
+        """转换为字典（仅包含非None参数）"""
+        result = {}
+        if self.search is not None:
+            result["search"] = self.search
+        if self.status is not None:
+            result["status"] = self.status
+        if self.date_from is not None:
+            result["date_from"] = self.date_from
+        if self.date_to is not None:
+            result["date_to"] = self.date_to
+        if self.created_by is not None:
+            result["created_by"] = self.created_by
+        return result
 
 
 def get_filter_params() -> FilterParams:
@@ -185,13 +200,13 @@ class DatabaseSession:
     def get_tenant_session(tenant_context: TenantContext = Depends(get_tenant_context)):
         """获取租户数据库会话"""
         def _get_session():
-            db = SessionLocal()
+            db = ScopedSession()
             try:
                 # 这里可以添加租户特定的数据库逻辑
                 # 例如设置租户上下文变量
                 yield db
             finally:
-                db.close()
+                ScopedSession.remove()
         return Depends(_get_session)
 
 
@@ -285,33 +300,38 @@ class ResourceValidator:
 
 
 class ServiceDependency:
-    """服务依赖注入"""
+    """服务依赖注入（服务无请求级状态，首次调用时导入并创建单例）"""
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_user_service():
         """获取用户服务"""
         from ..services.user_service import UserService
         return UserService()
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_device_service():
         """获取设备服务"""
         from ..services.device_service import DeviceService
         return DeviceService()
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_auth_service():
         """获取认证服务"""
         from ..services.auth_service import AuthService
         return AuthService()
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_alarm_service():
         """获取报警服务"""
         from ..services.alarm_service import AlarmService
         return AlarmService()
     
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_log_service():
         """获取日志服务"""
         from ..services.log_service import LogService
@@ -5,14 +5,20 @@
 
 import logging
 from typing import Any, Dict, Optional, Union
+
+import orjson
 from fastapi import HTTPException, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 
 logger = logging.getLogger(__name__)
 
+# 共享的空详情（只读），未提供详情的异常不再各自分配空字典
+_EMPTY: Dict[str, Any] = {}
+
 
 class BaseCustomException(Exception):
     """基础自定义异常"""
@@ -24,11 +30,19 @@ class BaseCustomException(Exception):
         status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR,
         details: Optional[Dict[str, Any]] = None,
     ):
+        # 不调用 Exception.__init__：args 已由 BaseException.__new__ 记录
         self.message = message
         self.error_code = error_code or self.__class__.__name__
         self.status_code = status_code
-        self.details = details or {}
-        super().__init__(self.message)
+        self._details = details
+    
+    def __str__(self) -> str:
+        return self.message
+    
+    @property
+    def details(self) -> Dict[str, Any]:
+        """错误详情（未提供时为共享空字典，不可修改）"""
+        return self._details or _EMPTY
 
 
 class BusinessLogicError(BaseCustomException):
@@ -57,15 +71,14 @@ class ValidationError(BaseCustomException):
         field: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
         if field:
-            error_details["field"] = field
+            details = {**(details or _EMPTY), "field": field}
         
         super().__init__(
             message=message,
             error_code="VALIDATION_ERROR",
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            details=error_details,
+            details=details,
         )
 
 
@@ -78,21 +91,19 @@ class NotFoundError(BaseCustomException):
         identifier: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        message = f"{resource} 未找到"
-        if identifier:
-            message = f"{resource} ({identifier}) 未找到"
+        message = f"{resource} ({identifier}) 未找到" if identifier else f"{resource} 未找到"
         
-        error_details = details or {}
-        error_details.update({
-            "resource": resource,
-            "identifier": identifier,
-        })
+        # 未传入附加详情时直接构建，不做合并
+        if details:
+            details = {**details, "resource": resource, "identifier": identifier}
+        else:
+            details = {"resource": resource, "identifier": identifier}
         
         super().__init__(
             message=message,
             error_code="NOT_FOUND_ERROR",
             status_code=status.HTTP_404_NOT_FOUND,
-            details=error_details,
+            details=details,
         )
 
 
@@ -121,15 +132,14 @@ class AuthorizationError(BaseCustomException):
         required_permission: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
         if required_permission:
-            error_details["required_permission"] = required_permission
+            details = {**(details or _EMPTY), "required_permission": required_permission}
         
         super().__init__(
             message=message,
             error_code="AUTHORIZATION_ERROR",
             status_code=status.HTTP_403_FORBIDDEN,
-            details=error_details,
+            details=details,
         )
 
 
@@ -142,15 +152,14 @@ class TenantError(BaseCustomException):
         tenant_id: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
         if tenant_id:
-            error_details["tenant_id"] = tenant_id
+            details = {**(details or _EMPTY), "tenant_id": tenant_id}
         
         super().__init__(
             message=message,
             error_code="TENANT_ERROR",
             status_code=status.HTTP_400_BAD_REQUEST,
-            details=error_details,
+            details=details,
         )
 
 
@@ -164,17 +173,18 @@ class DeviceError(BaseCustomException):
         device_status: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
-        if device_id:
-            error_details["device_id"] = device_id
-        if device_status:
-            error_details["device_status"] = device_status
+        if device_id or device_status:
+            details = dict(details or _EMPTY)
+            if device_id:
+                details["device_id"] = device_id
+            if device_status:
+                details["device_status"] = device_status
         
         super().__init__(
             message=message,
             error_code="DEVICE_ERROR",
             status_code=status.HTTP_400_BAD_REQUEST,
-            details=error_details,
+            details=details,
         )
 
 
@@ -187,15 +197,14 @@ class IntercomError(BaseCustomException):
         session_id: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
         if session_id:
-            error_details["session_id"] = session_id
+            details = {**(details or _EMPTY), "session_id": session_id}
         
         super().__init__(
             message=message,
             error_code="INTERCOM_ERROR",
             status_code=status.HTTP_400_BAD_REQUEST,
-            details=error_details,
+            details=details,
         )
 
 
@@ -209,17 +218,18 @@ class AlarmError(BaseCustomException):
         alarm_type: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
-        if alarm_id:
-            error_details["alarm_id"] = alarm_id
-        if alarm_type:
-            error_details["alarm_type"] = alarm_type
+        if alarm_id or alarm_type:
+            details = dict(details or _EMPTY)
+            if alarm_id:
+                details["alarm_id"] = alarm_id
+            if alarm_type:
+                details["alarm_type"] = alarm_type
         
         super().__init__(
             message=message,
             error_code="ALARM_ERROR",
             status_code=status.HTTP_400_BAD_REQUEST,
-            details=error_details,
+            details=details,
         )
 
 
@@ -232,15 +242,14 @@ class DatabaseError(BaseCustomException):
         operation: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
         if operation:
-            error_details["operation"] = operation
+            details = {**(details or _EMPTY), "operation": operation}
         
         super().__init__(
             message=message,
             error_code="DATABASE_ERROR",
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            details=error_details,
+            details=details,
         )
 
 
@@ -253,15 +262,14 @@ class ExternalServiceError(BaseCustomException):
         service_name: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
         if service_name:
-            error_details["service_name"] = service_name
+            details = {**(details or _EMPTY), "service_name": service_name}
         
         super().__init__(
             message=message,
             error_code="EXTERNAL_SERVICE_ERROR",
             status_code=status.HTTP_502_BAD_GATEWAY,
-            details=error_details,
+            details=details,
         )
 
 
@@ -274,15 +282,14 @@ class ConfigurationError(BaseCustomException):
         config_key: str = None,
         details: Optional[Dict[str, Any]] = None,
     ):
-        error_details = details or {}
         if config_key:
-            error_details["config_key"] = config_key
+            details = {**(details or _EMPTY), "config_key": config_key}
         
         super().__init__(
             message=message,
             error_code="CONFIGURATION_ERROR",
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            details=error_details,
+            details=details,
         )
 
 
@@ -322,98 +329,116 @@ def create_error_response(
     return error_response
 
 
+# 500错误的 error 对象预序列化，处理时只拼接请求ID
+_INTERNAL_ERROR = orjson.dumps({
+    "message": "内部服务器错误",
+    "error_code": "INTERNAL_SERVER_ERROR",
+    "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+    "details": {},
+})
+
+
+def _error_response(request: Request, status_code: int, error: bytes) -> Response:
+    """拼接已序列化的 error 对象与请求ID，生成JSON错误响应"""
+    request_id = getattr(request.state, "request_id", None)
+    if request_id:
+        body = b'{"error":%b,"request_id":%b}' % (error, orjson.dumps(request_id))
+    else:
+        body = b'{"error":%b}' % error
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
 async def custom_exception_handler(request: Request, exc: BaseCustomException):
     """自定义异常处理器"""
     logger.error(f"自定义异常: {exc.error_code} - {exc.message}", exc_info=True)
     
-    error_response = create_error_response(exc, request)
-    
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=error_response,
-    )
+    error = orjson.dumps({
+        "message": exc.message,
+        "error_code": exc.error_code,
+        "status_code": exc.status_code,
+        "details": exc.details,
+    })
+    return _error_response(request, exc.status_code, error)
 
 
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     """HTTP异常处理器"""
     logger.warning(f"HTTP异常: {exc.status_code} - {exc.detail}")
     
-    error_response = {
-        "error": {
-            "message": exc.detail,
-            "error_code": "HTTP_EXCEPTION",
-            "status_code": exc.status_code,
-            "details": {},
-        }
-    }
-    
-    request_id = getattr(request.state, "request_id", None)
-    if request_id:
-        error_response["request_id"] = request_id
-    
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=error_response,
-    )
+    error = orjson.dumps({
+        "message": exc.detail,
+        "error_code": "HTTP_EXCEPTION",
+        "status_code": exc.status_code,
+        "details": _EMPTY,
+    })
+    return _error_response(request, exc.status_code, error)
+
+
+def _loc_field(loc: tuple) -> str:
+    """错误位置转字段路径（跳过 'body' 等来源段，单段时免去拼接）"""
+    if len(loc) == 2:
+        return str(loc[1])
+    return " -> ".join(map(str, loc[1:]))
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """请求验证异常处理器"""
-    logger.warning(f"请求验证异常: {exc.errors()}")
+    errors = exc.errors()
+    logger.warning("请求验证异常: %s", errors)
     
     # 格式化验证错误
-    validation_errors = []
-    for error in exc.errors():
-        field = " -> ".join(str(loc) for loc in error["loc"][1:])  # 跳过 'body'
-        validation_errors.append({
-            "field": field,
+    validation_errors = [
+        {
+            "field": _loc_field(error["loc"]),
             "message": error["msg"],
             "type": error["type"],
-        })
-    
-    error_response = {
-        "error": {
-            "message": "请求数据验证失败",
-            "error_code": "REQUEST_VALIDATION_ERROR",
-            "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
-            "details": {
-                "validation_errors": validation_errors,
-            },
         }
-    }
-    
-    request_id = getattr(request.state, "request_id", None)
-    if request_id:
-        error_response["request_id"] = request_id
+        for error in errors
+    ]
     
-    return JSONResponse(
-        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content=error_response,
-    )
+    error = orjson.dumps({
+        "message": "请求数据验证失败",
+        "error_code": "REQUEST_VALIDATION_ERROR",
+        "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
+        "details": {
+            "validation_errors": validation_errors,
+        },
+    })
+    return _error_response(request, status.HTTP_422_UNPROCESSABLE_ENTITY, error)
 
 
 async def general_exception_handler(request: Request, exc: Exception):
     """通用异常处理器"""
-    logger.error(f"未处理的异常: {type(exc).__name__} - {str(exc)}", exc_info=True)
-    
-    error_response = create_error_response(exc, request)
+    if isinstance(exc, SQLAlchemyError):
+        logger.exception(f"数据库操作异常: {type(exc).__name__} - {str(exc)}")
+    else:
+        logger.exception(f"未处理的异常: {type(exc).__name__} - {str(exc)}")
     
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content=error_response,
-    )
+    return _error_response(request, status.HTTP_500_INTERNAL_SERVER_ERROR, _INTERNAL_ERROR)
+
 
+# 异常处理器映射：(异常类型, 处理器)，按顺序注册
+# 运行时由 Starlette 按异常类型的 MRO 选择处理器，此处无需再做 isinstance 分派
+exception_handlers = (
+    (BaseCustomException, custom_exception_handler),
+    (StarletteHTTPException, http_exception_handler),
+    (RequestValidationError, validation_exception_handler),
+    (Exception, general_exception_handler),
+)
 
-# 异常处理器映射
-exception_handlers = {
-    BaseCustomException: custom_exception_handler,
-    StarletteHTTPException: http_exception_handler,
-    RequestValidationError: validation_exception_handler,
-    Exception: general_exception_handler,
-}
+
+def _concrete_subclasses(cls: type):
+    """递归列出所有子类"""
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _concrete_subclasses(subclass)
 
 
 def setup_exception_handlers(app):
     """设置异常处理器"""
-    for exception_type, handler in exception_handlers.items():
+    for exception_type, handler in exception_handlers:
         app.add_exception_handler(exception_type, handler)
+    
+    # 为已定义的自定义异常子类逐一注册，Starlette 按 MRO 查找时首项即命中
+    for exception_type in _concrete_subclasses(BaseCustomException):
+        app.add_exception_handler(exception_type, custom_exception_handler)
@@ -0,0 +1,46 @@
+"""
+JWT编解码后端模块
+优先使用PyJWT（HMAC签名由OpenSSL执行），未安装时回退到python-jose
+"""
+
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+try:
+    import jwt as _jwt
+    from jwt import PyJWTError as JWTError
+
+    BACKEND = "pyjwt"
+
+    def prepare_key(secret_key: str, algorithm: str) -> Any:
+        """预处理签名密钥（PyJWT直接使用原始密钥）"""
+        return secret_key
+
+    def encode(payload: Dict[str, Any], key: Any, algorithm: str) -> str:
+        """签发令牌"""
+        return _jwt.encode(payload, key, algorithm=algorithm)
+
+    def decode(token: str, key: Any, algorithms: List[str]) -> Dict[str, Any]:
+        """校验并解码令牌，失败时抛出 JWTError"""
+        return _jwt.decode(token, key, algorithms=algorithms)
+
+except ImportError:
+    from jose import JWTError, jwk
+    from jose import jwt as _jwt
+
+    BACKEND = "jose"
+    logger.warning("未安装PyJWT，JWT编解码回退到python-jose")
+
+    def prepare_key(secret_key: str, algorithm: str) -> Any:
+        """预构建签名密钥，避免每次签发重复解析密钥"""
+        return jwk.construct(secret_key, algorithm)
+
+    def encode(payload: Dict[str, Any], key: Any, algorithm: str) -> str:
+        """签发令牌"""
+        return _jwt.encode(payload, key, algorithm=algorithm)
+
+    def decode(token: str, key: Any, algorithms: List[str]) -> Dict[str, Any]:
+        """校验并解码令牌，失败时抛出 JWTError"""
+        return _jwt.decode(token, key, algorithms=algorithms)
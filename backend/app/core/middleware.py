@@ -1,78 +1,178 @@
 """
 中间件模块
-提供请求日志、CORS、安全头等中间件
+提供请求日志、CORS、安全头等中间件（纯ASGI实现，避免BaseHTTPMiddleware的任务组与流式包装开销）
 """
 
+import re
 import time
 import uuid
 import logging
-from typing import Callable
-from datetime import datetime
+from typing import Optional
 
-from fastapi import Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import URL, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from ..config.settings import settings
-from .security import rate_limiter
+from ..config.settings import settings, DEFAULT_TENANT_ID
+from ..config.database import (
+    bind_session_scope,
+    reset_session_scope,
+    set_current_tenant,
+    reset_current_tenant,
+)
+from .security import rate_limiter, rate_limit_key
 
 logger = logging.getLogger(__name__)
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """请求日志中间件"""
+# 当前秒的UTC ISO时间串缓存：(秒, 时间串)
+_cached_iso = (0, "")
+
+
+def _utc_iso_now() -> str:
+    """当前UTC时间（秒精度ISO格式），同一秒内复用已格式化的字符串"""
+    global _cached_iso
+    now = int(time.time())
+    if _cached_iso[0] != now:
+        _cached_iso = (now, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now)))
+    return _cached_iso[1]
+
+
+def _client_host(scope: Scope):
+    """获取客户端IP"""
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    """直接扫描ASGI原始请求头取值（name 为小写字节串），不构建 Headers 对象"""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+# 租户ID请求头名与查询参数标记（ASGI请求头名均为小写字节串）
+_TENANT_HEADER = b"x-tenant-id"
+_TENANT_QUERY_MARK = b"tenant_id="
+
+# 可沿用的上游请求ID：仅限字母数字与 ._- ，最长128字符，否则重新生成
+_REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+
+# 安全响应头（模块级常量，按ASGI原始字节格式预构建）
+_SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+]
+_HSTS_HEADER = (b"strict-transport-security", b"max-age=31536000; includeSubDomains")
+# 默认租户的响应头（多数请求未指定租户，免去逐请求编码）
+_DEFAULT_TENANT_HEADER = (b"x-tenant-id", DEFAULT_TENANT_ID.encode("latin-1"))
+
+
+class CoreMiddleware:
+    """核心中间件
+
+    合并请求ID与请求日志、租户上下文、安全头和审计日志：
+    一次解析请求头，一次包装 send，在响应开始时一并追加响应头。
+    """
+    
+    def __init__(self, app: ASGIApp, audit: bool = False):
+        self.app = app
+        self.audit = audit
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # 生成请求ID
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # 优先沿用上游传入的请求ID，否则生成（hex格式免去连字符格式化）
+        request_id = _header(scope, b"x-request-id")
+        if request_id is None or not _REQUEST_ID_RE.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        
+        # 从请求头或查询参数中提取租户ID（优先从头部获取），未提供时使用默认租户
+        tenant_id = _header(scope, _TENANT_HEADER)
+        if tenant_id is None and _TENANT_QUERY_MARK in scope["query_string"]:
+            tenant_id = QueryParams(scope["query_string"]).get("tenant_id")
+        if not tenant_id:
+            tenant_id = DEFAULT_TENANT_ID
+        
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["tenant_id"] = tenant_id
+        
+        # 记录请求开始时间（单调时钟，不受系统时间调整影响）
+        start_time = time.perf_counter()
+        timestamp = _utc_iso_now()
         
-        # 记录请求开始时间
-        start_time = time.time()
+        # 记录请求日志（INFO未启用时不构建URL与日志参数）
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "请求开始 - ID: %s, IP: %s, 方法: %s, URL: %s, User-Agent: %s",
+                request_id,
+                _client_host(scope),
+                scope["method"],
+                URL(scope=scope),
+                _header(scope, b"user-agent") or "",
+            )
         
-        # 获取客户端信息
-        client_ip = request.client.host
-        user_agent = request.headers.get("user-agent", "")
-        method = request.method
-        url = str(request.url)
+        # 固定响应头（请求ID、租户、安全头）按ASGI原始字节格式预先拼好
+        extra_headers = [
+            (b"x-request-id", request_id.encode("latin-1")),
+            _DEFAULT_TENANT_HEADER if tenant_id == DEFAULT_TENANT_ID
+            else (b"x-tenant-id", tenant_id.encode("latin-1")),
+        ]
+        extra_headers += _SECURITY_HEADERS
+        if scope.get("scheme") == "https":
+            extra_headers.append(_HSTS_HEADER)
         
-        # 记录请求日志
-        logger.info(
-            f"请求开始 - ID: {request_id}, IP: {client_ip}, "
-            f"方法: {method}, URL: {url}, User-Agent: {user_agent}"
-        )
+        status_code = None
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = message["headers"] = list(message.get("headers", ()))
+                headers += extra_headers
+                headers.append((b"x-process-time", b"%.3f" % (time.perf_counter() - start_time)))
+            await send(message)
+        
+        # 设置租户上下文并绑定请求级数据库会话作用域
+        # （作用域键由服务端逐请求生成，不使用客户端可控的请求ID，避免并发请求共享会话）
+        tenant_token = set_current_tenant(tenant_id)
+        scope_token = bind_session_scope(uuid.uuid4().hex)
         
         try:
             # 处理请求
-            response = await call_next(request)
-            
-            # 计算处理时间
-            process_time = time.time() - start_time
+            await self.app(scope, receive, send_wrapper)
             
             # 记录响应日志
+            process_time = time.perf_counter() - start_time
             logger.info(
-                f"请求完成 - ID: {request_id}, 状态: {response.status_code}, "
-                f"处理时间: {process_time:.3f}s"
+                "请求完成 - ID: %s, 状态: %s, 处理时间: %.3fs",
+                request_id, status_code, process_time,
             )
             
-            # 添加响应头
-            response.headers["X-Request-ID"] = request_id
-            response.headers["X-Process-Time"] = f"{process_time:.3f}"
-            
-            return response
-            
         except Exception as e:
             # 记录异常日志
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             logger.error(
-                f"请求异常 - ID: {request_id}, 错误: {str(e)}, "
-                f"处理时间: {process_time:.3f}s",
+                "请求异常 - ID: %s, 错误: %s, 处理时间: %.3fs",
+                request_id, e, process_time,
                 exc_info=True
             )
             
-            # 返回错误响应
-            return JSONResponse(
+            # 响应已开始发送时无法再返回错误响应
+            if status_code is not None:
+                raise
+            
+            # 返回错误响应（经 send_wrapper 追加请求ID等响应头）
+            response = ORJSONResponse(
                 status_code=500,
                 content={
                     "error": {
@@ -82,53 +182,63 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                     },
                     "request_id": request_id,
                 },
-                headers={
-                    "X-Request-ID": request_id,
-                    "X-Process-Time": f"{process_time:.3f}",
-                }
             )
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """安全头中间件"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
-        
-        # 添加安全头
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+            await response(scope, receive, send_wrapper)
         
-        # 如果是HTTPS，添加HSTS头
-        if request.url.scheme == "https":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        finally:
+            reset_session_scope(scope_token)
+            reset_current_tenant(tenant_token)
         
-        return response
+        # 审计日志：跳过GET请求和静态文件；审计日志级别未启用时不收集审计信息
+        if (
+            self.audit
+            and scope["method"] != "GET"
+            and not scope["path"].startswith("/static")
+            and logger.isEnabledFor(logging.INFO)
+        ):
+            query_string = scope["query_string"]
+            audit_info = {
+                "timestamp": timestamp,
+                "request_id": request_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query_params": dict(QueryParams(query_string)) if query_string else {},
+                "client_ip": _client_host(scope),
+                "user_agent": _header(scope, b"user-agent"),
+                "tenant_id": tenant_id,
+                "status_code": status_code,
+                "process_time": process_time,
+            }
+            
+            # 记录审计日志（这里可以发送到专门的审计日志系统）
+            logger.info("审计日志: %s", audit_info)
+
 
+# 不做频率限制的端点（文档与健康检查）
+_RATE_LIMIT_SKIP_PATHS = frozenset({"/docs", "/redoc", "/openapi.json", "/health"})
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+
+class RateLimitMiddleware:
     """频率限制中间件"""
     
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, requests_per_minute: int = 60):
+        self.app = app
         self.requests_per_minute = requests_per_minute
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # 跳过文档和健康检查端点
-        if request.url.path in ["/docs", "/redoc", "/openapi.json", "/health"]:
-            return await call_next(request)
+        if scope["type"] != "http" or scope["path"] in _RATE_LIMIT_SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
         
         # 获取客户端IP
-        client_ip = request.client.host
-        key = f"rate_limit:{client_ip}"
+        client_ip = _client_host(scope)
+        key = rate_limit_key(client_ip)
         
         # 检查频率限制
-        if not rate_limiter.is_allowed(key, self.requests_per_minute, 60):
+        if not await rate_limiter.ais_allowed(key, self.requests_per_minute, 60):
             logger.warning(f"IP {client_ip} 触发频率限制")
-            return JSONResponse(
+            response = ORJSONResponse(
                 status_code=429,
                 content={
                     "error": {
@@ -147,104 +257,30 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "Retry-After": "60",
                 }
             )
+            await response(scope, receive, send)
+            return
         
-        return await call_next(request)
-
-
-class TenantContextMiddleware(BaseHTTPMiddleware):
-    """租户上下文中间件"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # 从请求头或查询参数中提取租户ID
-        tenant_id = None
-        
-        # 优先从头部获取
-        if "X-Tenant-ID" in request.headers:
-            tenant_id = request.headers["X-Tenant-ID"]
-        
-        # 其次从查询参数获取
-        elif "tenant_id" in request.query_params:
-            tenant_id = request.query_params["tenant_id"]
-        
-        # 如果没有提供租户ID，使用默认租户
-        if not tenant_id:
-            tenant_id = settings.default_tenant_id
-        
-        # 设置租户上下文
-        request.state.tenant_id = tenant_id
-        
-        response = await call_next(request)
-        
-        # 在响应头中添加租户信息
-        response.headers["X-Tenant-ID"] = tenant_id
-        
-        return response
-
-
-class DatabaseConnectionMiddleware(BaseHTTPMiddleware):
-    """数据库连接中间件"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # 这里可以添加数据库连接检查逻辑
-        # 例如检查数据库是否可用
-        
-        try:
-            response = await call_next(request)
-            return response
-        except Exception as e:
-            # 如果是数据库相关错误，可以在这里进行特殊处理
-            logger.error(f"数据库操作异常: {str(e)}", exc_info=True)
-            raise
+        await self.app(scope, receive, send)
 
 
-class AuditLogMiddleware(BaseHTTPMiddleware):
-    """审计日志中间件"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # 跳过GET请求和静态文件
-        if request.method == "GET" or request.url.path.startswith("/static"):
-            return await call_next(request)
-        
-        # 记录审计信息
-        audit_info = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "request_id": getattr(request.state, "request_id", None),
-            "method": request.method,
-            "path": request.url.path,
-            "query_params": dict(request.query_params),
-            "client_ip": request.client.host,
-            "user_agent": request.headers.get("user-agent"),
-            "tenant_id": getattr(request.state, "tenant_id", None),
-        }
-        
-        # 处理请求
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        # 补充响应信息
-        audit_info.update({
-            "status_code": response.status_code,
-            "process_time": process_time,
-        })
-        
-        # 记录审计日志（这里可以发送到专门的审计日志系统）
-        logger.info(f"审计日志: {audit_info}")
-        
-        return response
-
-
-class HealthCheckMiddleware(BaseHTTPMiddleware):
+class HealthCheckMiddleware:
     """健康检查中间件"""
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # 配置在进程内不变，构造时读取一次
+        self.app_version = settings.app_version
+        self.environment = settings.environment
+        self.redis_configured = bool(settings.redis_url)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # 处理健康检查请求
-        if request.url.path == "/health":
+        if scope["type"] == "http" and scope["path"] == "/health":
             health_status = {
                 "status": "healthy",
-                "timestamp": datetime.utcnow().isoformat(),
-                "version": settings.app_version,
-                "environment": settings.environment,
+                "timestamp": _utc_iso_now(),
+                "version": self.app_version,
+                "environment": self.environment,
             }
             
             # 检查数据库连接
@@ -257,7 +293,7 @@ class HealthCheckMiddleware(BaseHTTPMiddleware):
                 health_status["status"] = "unhealthy"
             
             # 检查Redis连接（如果配置了）
-            if settings.redis_url:
+            if self.redis_configured:
                 try:
                     # 这里可以添加Redis连接检查
                     health_status["redis"] = "connected"
@@ -266,18 +302,20 @@ class HealthCheckMiddleware(BaseHTTPMiddleware):
             
             status_code = 200 if health_status["status"] == "healthy" else 503
             
-            return JSONResponse(
+            response = ORJSONResponse(
                 status_code=status_code,
                 content=health_status
             )
+            await response(scope, receive, send)
+            return
         
-        return await call_next(request)
+        await self.app(scope, receive, send)
 
 
 def setup_middleware(app):
-    """设置所有中间件"""
+    """设置所有中间件（后添加的位于外层）"""
     
-    # CORS中间件（最外层）
+    # CORS中间件
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.cors_origins,
@@ -286,26 +324,13 @@ def setup_middleware(app):
         allow_headers=settings.cors_headers,
     )
     
-    # 安全头中间件
-    app.add_middleware(SecurityHeadersMiddleware)
-    
     # 频率限制中间件
     app.add_middleware(RateLimitMiddleware, requests_per_minute=60)
     
-    # 请求日志中间件
-    app.add_middleware(RequestLoggingMiddleware)
-    
-    # 租户上下文中间件
-    app.add_middleware(TenantContextMiddleware)
+    # 核心中间件（请求日志、租户上下文、安全头、审计日志）
+    app.add_middleware(CoreMiddleware, audit=settings.enable_audit_logging)
     
     # 健康检查中间件
     app.add_middleware(HealthCheckMiddleware)
     
-    # 审计日志中间件
-    if settings.enable_audit_logging:
-        app.add_middleware(AuditLogMiddleware)
-    
-    # 数据库连接中间件
-    app.add_middleware(DatabaseConnectionMiddleware)
-    
     logger.info("所有中间件设置完成")
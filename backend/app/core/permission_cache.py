@@ -0,0 +1,151 @@
+"""
+权限缓存模块
+提供用户角色与权限的两级缓存（进程内L1 + Redis L2）
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+from cachetools import TTLCache
+
+from .redis_client import init_redis
+
+logger = logging.getLogger(__name__)
+
+# 失效通知频道，多进程间同步L1失效
+INVALIDATE_CHANNEL = "perm:invalidate"
+
+
+def user_info_key(tenant_id: Optional[str], user_id: str) -> str:
+    """当前用户信息缓存键（角色权限变更时一并失效）"""
+    return f"userinfo:{tenant_id}:{user_id}"
+
+
+class PermissionCache:
+    """用户角色权限缓存"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = 60, redis_ttl: int = 300):
+        # L1：进程内TTL缓存，仅在事件循环线程中访问
+        self._local: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.redis_ttl = redis_ttl
+        self._redis = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def _cache_key(tenant_id: Optional[str], user_id: str) -> str:
+        """生成缓存键"""
+        return f"perm:{tenant_id}:{user_id}"
+
+    async def connect(self) -> None:
+        """连接Redis并订阅失效通知（未配置Redis时仅使用L1）"""
+        self._loop = asyncio.get_running_loop()
+        if self._redis is not None:
+            return
+
+        self._redis = await init_redis()
+        if self._redis is None:
+            return
+
+        self._listener_task = self._loop.create_task(self._listen_invalidations())
+
+    async def close(self) -> None:
+        """停止失效订阅（共享Redis连接由 close_redis 关闭）"""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+        self._redis = None
+        self._loop = None
+
+    async def _listen_invalidations(self) -> None:
+        """监听其他进程发布的失效通知"""
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(INVALIDATE_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self._local.pop(message["data"].decode(), None)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"权限缓存失效订阅中断: {e}")
+        finally:
+            await pubsub.close()
+
+    async def get_roles_and_perms(
+        self,
+        user_id: str,
+        tenant_id: Optional[str],
+        loader: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """获取用户角色和权限：L1 → L2 → 数据库，未命中时回写两级缓存
+
+        返回 {"roles": [{"code", "name"}], "permissions": [...]}
+        """
+        key = self._cache_key(tenant_id, user_id)
+
+        data = self._local.get(key)
+        if data is not None:
+            return data
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(key)
+                if raw is not None:
+                    data = orjson.loads(raw)
+                    self._local[key] = data
+                    return data
+            except Exception as e:
+                logger.warning(f"读取Redis权限缓存失败: {e}")
+
+        data = await loader()
+        self._local[key] = data
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(key, orjson.dumps(data), ex=self.redis_ttl)
+            except Exception as e:
+                logger.warning(f"写入Redis权限缓存失败: {e}")
+
+        return data
+
+    async def invalidate(self, user_id: str, tenant_id: Optional[str]) -> None:
+        """失效指定用户的缓存并通知其他进程"""
+        key = self._cache_key(tenant_id, user_id)
+        self._local.pop(key, None)
+
+        if self._redis is not None:
+            try:
+                await self._redis.delete(key, user_info_key(tenant_id, user_id))
+                await self._redis.publish(INVALIDATE_CHANNEL, key)
+            except Exception as e:
+                logger.warning(f"失效Redis权限缓存失败: {e}")
+
+    def _invalidate_soon(self, user_id: str, tenant_id: Optional[str]) -> None:
+        """在事件循环线程中清除L1并调度L2失效"""
+        self._local.pop(self._cache_key(tenant_id, user_id), None)
+        if self._redis is not None:
+            self._loop.create_task(self.invalidate(user_id, tenant_id))
+
+    def invalidate_nowait(self, user_id: str, tenant_id: Optional[str]) -> None:
+        """同步代码中失效缓存（可在线程池中调用）"""
+        if self._loop is None:
+            self._local.pop(self._cache_key(tenant_id, user_id), None)
+            return
+
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+
+        if on_loop:
+            self._invalidate_soon(user_id, tenant_id)
+        else:
+            # 线程池中调用：TTLCache非线程安全，交回事件循环执行
+            self._loop.call_soon_threadsafe(self._invalidate_soon, user_id, tenant_id)
+
+
+# 全局权限缓存实例
+permission_cache = PermissionCache()
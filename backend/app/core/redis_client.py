@@ -0,0 +1,42 @@
+"""
+Redis客户端模块
+提供进程内共享的异步Redis连接（未配置REDIS_URL时不启用）
+"""
+
+import logging
+from typing import Optional
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_redis = None
+
+
+async def init_redis():
+    """初始化共享Redis连接，未配置或未安装redis时返回None"""
+    global _redis
+    if _redis is not None or not settings.redis_url:
+        return _redis
+
+    try:
+        from redis import asyncio as aioredis
+    except ImportError:
+        logger.warning("未安装redis，Redis相关功能仅使用进程内实现")
+        return None
+
+    _redis = aioredis.from_url(settings.redis_url, password=settings.redis_password)
+    return _redis
+
+
+def get_redis() -> Optional[object]:
+    """获取共享Redis连接（未初始化时为None）"""
+    return _redis
+
+
+async def close_redis() -> None:
+    """关闭共享Redis连接"""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
@@ -3,22 +3,47 @@
 提供JWT认证、密码加密、权限验证等功能
 """
 
+import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Union
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional, Dict, Any, Iterable, Tuple, Union
 
-from jose import JWTError, jwt
+from cachetools import LRUCache, TTLCache
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from ..config.settings import settings
-from ..config.tenant_config import get_tenant_config
+from ..config.tenant_config import aget_tenant_config
+from . import jwt_backend
+from .jwt_backend import JWTError
+from .redis_client import get_redis
+from .token_blacklist import token_blacklist
 
 logger = logging.getLogger(__name__)
 
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 密码加密上下文：新密码使用Argon2id（argon2-cffi），bcrypt仅用于校验存量哈希并在登录时升级
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="id",
+    argon2__memory_cost=settings.password_hash_memory_cost,
+    argon2__rounds=settings.password_hash_time_cost,
+    argon2__parallelism=settings.password_hash_parallelism,
+    argon2__digest_size=32,
+    argon2__salt_size=16,
+)
+
+# 密码最大长度：超长输入直接拒绝，避免攻击者以超长密码放大哈希开销
+MAX_PASSWORD_LENGTH = 128
+
+# 密码哈希并发上限：哈希在线程池中执行且为CPU/内存密集型，超过核数的并发只会争抢CPU并放大内存占用
+_password_hash_slots = threading.BoundedSemaphore(settings.password_hash_concurrency)
 
 # JWT Bearer认证
 security = HTTPBearer()
@@ -32,14 +57,37 @@ class SecurityManager:
         self.algorithm = settings.algorithm
         self.access_token_expire_minutes = settings.access_token_expire_minutes
         self.refresh_token_expire_days = settings.refresh_token_expire_days
+        # 预处理签名密钥与允许的算法列表，避免每次签发/验证重复构建
+        self.signing_key = jwt_backend.prepare_key(self.secret_key, self.algorithm)
+        self._algorithms = [self.algorithm]
+        self._access_ttl = timedelta(minutes=self.access_token_expire_minutes)
+        self._refresh_ttl = timedelta(days=self.refresh_token_expire_days)
+        # 已验证令牌的短期缓存（键为令牌SHA-256摘要前16字节），同一令牌在有效窗口内免去重复验签
+        self._token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+        self._token_cache_lock = threading.Lock()
+    
+    @staticmethod
+    def _token_cache_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()[:16]
     
     def create_password_hash(self, password: str) -> str:
         """创建密码哈希"""
-        return pwd_context.hash(password)
+        with _password_hash_slots:
+            return pwd_context.hash(password)
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """验证密码"""
-        return pwd_context.verify(plain_password, hashed_password)
+        """验证密码（passlib内部以常量时间比较哈希，所有密码校验均应经由此方法）"""
+        if len(plain_password) > MAX_PASSWORD_LENGTH:
+            return False
+        with _password_hash_slots:
+            return pwd_context.verify(plain_password, hashed_password)
+    
+    def verify_and_update_password(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """验证密码，哈希算法或参数已过时则同时返回新哈希（否则为None）"""
+        if len(plain_password) > MAX_PASSWORD_LENGTH:
+            return False, None
+        with _password_hash_slots:
+            return pwd_context.verify_and_update(plain_password, hashed_password)
     
     def create_access_token(
         self, 
@@ -49,20 +97,16 @@ class SecurityManager:
         """创建访问令牌"""
         to_encode = data.copy()
         
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(
-                minutes=self.access_token_expire_minutes
-            )
-        
+        # exp/iat 直接使用整数时间戳（JWT标准格式），不构造 datetime
+        now = int(time.time())
         to_encode.update({
-            "exp": expire,
+            "exp": now + int((expires_delta or self._access_ttl).total_seconds()),
             "type": "access",
-            "iat": datetime.utcnow(),
+            "iat": now,
+            "jti": uuid.uuid4().hex,
         })
         
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        encoded_jwt = jwt_backend.encode(to_encode, self.signing_key, self.algorithm)
         return encoded_jwt
     
     def create_refresh_token(
@@ -73,26 +117,43 @@ class SecurityManager:
         """创建刷新令牌"""
         to_encode = data.copy()
         
-        if expires_delta:
-            expire = datetime.utcnow() + expires_delta
-        else:
-            expire = datetime.utcnow() + timedelta(
-                days=self.refresh_token_expire_days
-            )
-        
+        # exp/iat 直接使用整数时间戳（JWT标准格式），不构造 datetime
+        now = int(time.time())
         to_encode.update({
-            "exp": expire,
+            "exp": now + int((expires_delta or self._refresh_ttl).total_seconds()),
             "type": "refresh",
-            "iat": datetime.utcnow(),
+            "iat": now,
+            "jti": uuid.uuid4().hex,
         })
         
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        encoded_jwt = jwt_backend.encode(to_encode, self.signing_key, self.algorithm)
         return encoded_jwt
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """验证令牌"""
+        """验证令牌（命中缓存时仅复核过期时间；返回的载荷为共享对象，不可修改）"""
+        key = self._token_cache_key(token)
+        with self._token_cache_lock:
+            payload = self._token_cache.get(key)
+        if payload is not None:
+            exp = payload.get("exp")
+            if not exp or exp > time.time():
+                return payload
+        
+        payload = self._decode_token(token)
+        if payload is not None:
+            with self._token_cache_lock:
+                self._token_cache[key] = payload
+        return payload
+    
+    def invalidate_token(self, token: str) -> None:
+        """移除令牌的验证缓存（登出时调用）"""
+        with self._token_cache_lock:
+            self._token_cache.pop(self._token_cache_key(token), None)
+    
+    def _decode_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """解码并校验令牌签名、类型与过期时间"""
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = jwt_backend.decode(token, self.signing_key, self._algorithms)
             
             # 检查令牌类型
             token_type = payload.get("type")
@@ -101,7 +162,7 @@ class SecurityManager:
             
             # 检查过期时间
             exp = payload.get("exp")
-            if exp and datetime.fromtimestamp(exp) < datetime.utcnow():
+            if exp and exp < time.time():
                 return None
             
             return payload
@@ -148,14 +209,25 @@ security_manager = SecurityManager()
 class CurrentUser:
     """当前用户信息"""
     
+    __slots__ = (
+        "user_id",
+        "username",
+        "email",
+        "tenant_id",
+        "roles",
+        "permissions",
+        "is_active",
+        "is_superuser",
+    )
+    
     def __init__(
         self,
         user_id: str,
         username: str,
         email: str,
         tenant_id: str,
-        roles: list = None,
-        permissions: list = None,
+        roles: Iterable[str] = None,
+        permissions: Iterable[str] = None,
         is_active: bool = True,
         is_superuser: bool = False,
     ):
@@ -163,8 +235,9 @@ class CurrentUser:
         self.username = username
         self.email = email
         self.tenant_id = tenant_id
-        self.roles = roles or []
-        self.permissions = permissions or []
+        # 角色与权限以集合保存，成员检查为O(1)
+        self.roles = frozenset(roles or ())
+        self.permissions = frozenset(permissions or ())
         self.is_active = is_active
         self.is_superuser = is_superuser
     
@@ -176,73 +249,70 @@ class CurrentUser:
         """检查是否有指定角色"""
         return self.is_superuser or role in self.roles
     
-    def has_any_role(self, roles: list) -> bool:
+    def has_any_role(self, roles: Iterable[str]) -> bool:
         """检查是否有任意指定角色"""
-        return self.is_superuser or any(role in self.roles for role in roles)
+        return self.is_superuser or not self.roles.isdisjoint(roles)
     
-    def has_all_roles(self, roles: list) -> bool:
+    def has_all_roles(self, roles: Iterable[str]) -> bool:
         """检查是否有所有指定角色"""
-        return self.is_superuser or all(role in self.roles for role in roles)
+        return self.is_superuser or self.roles.issuperset(roles)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    request: Request = None,
-) -> CurrentUser:
-    """获取当前用户"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    """凭据无效异常（仅在校验失败时构造）"""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无法验证凭据",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> CurrentUser:
+    """获取当前用户（令牌解码错误已在 verify_token 中处理）"""
+    # 验证访问令牌
+    payload = security_manager.verify_access_token(credentials.credentials)
+    if payload is None:
+        raise _credentials_exception()
     
-    try:
-        # 验证访问令牌
-        payload = security_manager.verify_access_token(credentials.credentials)
-        if payload is None:
-            raise credentials_exception
-        
-        # 提取用户信息
-        user_id: str = payload.get("sub")
-        tenant_id: str = payload.get("tenant_id")
-        username: str = payload.get("username")
-        email: str = payload.get("email")
-        roles: list = payload.get("roles", [])
-        permissions: list = payload.get("permissions", [])
-        is_active: bool = payload.get("is_active", True)
-        is_superuser: bool = payload.get("is_superuser", False)
-        
-        if user_id is None or tenant_id is None:
-            raise credentials_exception
-        
-        # 检查用户是否活跃
-        if not is_active:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="用户账户已禁用",
-            )
-        
-        # 检查租户配置
-        tenant_config = get_tenant_config(tenant_id)
-        if not tenant_config.active:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="租户账户已禁用",
-            )
-        
-        return CurrentUser(
-            user_id=user_id,
-            username=username,
-            email=email,
-            tenant_id=tenant_id,
-            roles=roles,
-            permissions=permissions,
-            is_active=is_active,
-            is_superuser=is_superuser,
+    # 检查令牌是否已吊销（登出）
+    if await token_blacklist.is_revoked(payload.get("jti")):
+        raise _credentials_exception()
+    
+    # 提取用户信息
+    user_id: str = payload.get("sub")
+    tenant_id: str = payload.get("tenant_id")
+    is_active: bool = payload.get("is_active", True)
+    
+    if user_id is None or tenant_id is None:
+        raise _credentials_exception()
+    
+    # 检查用户是否活跃
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="用户账户已禁用",
         )
-        
-    except JWTError:
-        raise credentials_exception
+    
+    # 检查租户配置
+    tenant_config = await aget_tenant_config(tenant_id)
+    if not tenant_config.active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="租户账户已禁用",
+        )
+    
+    return CurrentUser(
+        user_id=user_id,
+        username=payload.get("username"),
+        email=payload.get("email"),
+        tenant_id=tenant_id,
+        roles=payload.get("roles"),
+        permissions=payload.get("permissions"),
+        is_active=is_active,
+        is_superuser=payload.get("is_superuser", False),
+    )
 
 
 async def get_current_active_user(
@@ -259,7 +329,7 @@ async def get_current_active_user(
 
 def require_permission(permission: str):
     """权限装饰器"""
-    def permission_checker(current_user: CurrentUser = Depends(get_current_user)):
+    async def permission_checker(current_user: CurrentUser = Depends(get_current_user)):
         if not current_user.has_permission(permission):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -271,7 +341,7 @@ def require_permission(permission: str):
 
 def require_role(role: str):
     """角色装饰器"""
-    def role_checker(current_user: CurrentUser = Depends(get_current_user)):
+    async def role_checker(current_user: CurrentUser = Depends(get_current_user)):
         if not current_user.has_role(role):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -283,8 +353,10 @@ def require_role(role: str):
 
 def require_any_role(*roles: str):
     """任意角色装饰器"""
-    def role_checker(current_user: CurrentUser = Depends(get_current_user)):
-        if not current_user.has_any_role(list(roles)):
+    required_roles = frozenset(roles)
+    
+    async def role_checker(current_user: CurrentUser = Depends(get_current_user)):
+        if not current_user.has_any_role(required_roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"缺少所需角色之一: {', '.join(roles)}",
@@ -295,7 +367,7 @@ def require_any_role(*roles: str):
 
 def require_superuser():
     """超级用户装饰器"""
-    def superuser_checker(current_user: CurrentUser = Depends(get_current_user)):
+    async def superuser_checker(current_user: CurrentUser = Depends(get_current_user)):
         if not current_user.is_superuser:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -306,45 +378,78 @@ def require_superuser():
 
 
 class RateLimiter:
-    """API频率限制器"""
+    """API频率限制器（滑动窗口）"""
     
-    def __init__(self):
-        self.requests = {}
+    def __init__(self, maxsize: int = 100_000):
+        # 每个键一个按时间递增的请求时刻队列（monotonic），按LRU淘汰不活跃的键以限制内存
+        self.requests: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
     
     def is_allowed(self, key: str, limit: int, window: int) -> bool:
         """检查是否允许请求"""
-        now = datetime.utcnow()
+        now = time.monotonic()
+        cutoff = now - window
         
-        if key not in self.requests:
-            self.requests[key] = []
+        with self._lock:
+            timestamps = self.requests.get(key)
+            if timestamps is None:
+                timestamps = self.requests[key] = deque()
+            
+            # 清理过期请求（队首最旧，逐个弹出）
+            while timestamps and timestamps[0] <= cutoff:
+                timestamps.popleft()
+            
+            # 检查是否超过限制
+            if len(timestamps) >= limit:
+                return False
+            
+            # 记录新请求
+            timestamps.append(now)
+            return True
+    
+    async def ais_allowed(self, key: str, limit: int, window: int) -> bool:
+        """跨进程检查是否允许请求：先查进程内窗口，再以Redis固定窗口计数
+
+        本进程已超限时直接拒绝，不访问Redis；未配置Redis或Redis异常时仅按进程内窗口限制。
+        """
+        if not self.is_allowed(key, limit, window):
+            return False
         
-        # 清理过期请求
-        self.requests[key] = [
-            req_time for req_time in self.requests[key]
-            if (now - req_time).total_seconds() < window
-        ]
+        redis = get_redis()
+        if redis is None:
+            return True
         
-        # 检查是否超过限制
-        if len(self.requests[key]) >= limit:
-            return False
+        bucket_key = f"{key}:{int(time.time()) // window}"
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.incr(bucket_key)
+            pipe.expire(bucket_key, window)
+            count, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis频率限制计数失败: {e}")
+            return True
         
-        # 记录新请求
-        self.requests[key].append(now)
-        return True
+        return count <= limit
 
 
 # 全局频率限制器
 rate_limiter = RateLimiter()
 
 
+@lru_cache(maxsize=4096)
+def rate_limit_key(client_ip: Optional[str]) -> str:
+    """按客户端IP生成频率限制键（活跃IP复用同一键对象）"""
+    return f"rate_limit:{client_ip}"
+
+
 def create_rate_limit_dependency(requests_per_minute: int = 60):
     """创建频率限制依赖"""
     async def rate_limit_checker(request: Request):
         # 使用IP地址作为键
         client_ip = request.client.host
-        key = f"rate_limit:{client_ip}"
+        key = rate_limit_key(client_ip)
         
-        if not rate_limiter.is_allowed(key, requests_per_minute, 60):
+        if not await rate_limiter.ais_allowed(key, requests_per_minute, 60):
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 detail="请求频率过高，请稍后再试",
@@ -0,0 +1,68 @@
+"""
+令牌黑名单模块
+按JTI记录已吊销的令牌，有效期与令牌剩余有效期一致
+"""
+
+import logging
+import time
+from typing import Optional
+
+from cachetools import TLRUCache
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBlacklist:
+    """令牌黑名单（Redis优先，未配置Redis时使用进程内缓存）"""
+
+    def __init__(self, maxsize: int = 100_000):
+        # 值为过期时刻（monotonic），按条目各自过期
+        self._local: TLRUCache = TLRUCache(maxsize=maxsize, ttu=lambda key, expires_at, now: expires_at)
+
+    @staticmethod
+    def _key(jti: str) -> str:
+        return f"revoked:{jti}"
+
+    async def revoke(self, jti: Optional[str], exp: Optional[int]) -> None:
+        """吊销令牌，exp为令牌过期时间戳"""
+        if not jti or not exp:
+            return
+
+        ttl = int(exp - time.time())
+        if ttl <= 0:
+            return
+
+        redis = get_redis()
+        if redis is None:
+            self._local[jti] = time.monotonic() + ttl
+            return
+
+        try:
+            await redis.set(self._key(jti), 1, ex=ttl)
+        except Exception as e:
+            logger.error(f"写入令牌黑名单失败: {e}")
+            self._local[jti] = time.monotonic() + ttl
+
+    async def is_revoked(self, jti: Optional[str]) -> bool:
+        """检查令牌是否已吊销"""
+        if not jti:
+            return False
+
+        if jti in self._local:
+            return True
+
+        redis = get_redis()
+        if redis is None:
+            return False
+
+        try:
+            return bool(await redis.exists(self._key(jti)))
+        except Exception as e:
+            logger.warning(f"查询令牌黑名单失败: {e}")
+            return False
+
+
+# 全局令牌黑名单实例
+token_blacklist = TokenBlacklist()
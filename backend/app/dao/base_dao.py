@@ -4,13 +4,15 @@
 """
 
 import logging
-from typing import Type, TypeVar, Generic, Optional, List, Dict, Any, Union
+import operator
+from typing import Type, TypeVar, Generic, Optional, List, Dict, Any, Iterator, Sequence, Union
 from sqlalchemy import and_, or_, desc, asc, func, text
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.orm import Session, Query
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..config.database import db_manager
-from ..config.settings import settings
+from ..config.settings import TENANT_ISOLATION
 from ..models.base import BaseModel
 from ..core.exceptions import DatabaseError, NotFoundError, ValidationError
 
@@ -19,6 +21,24 @@ logger = logging.getLogger(__name__)
 # 泛型类型变量
 T = TypeVar('T', bound=BaseModel)
 
+# 复杂过滤操作符 -> 条件构造函数（返回None表示忽略该条件）
+_FILTER_OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'like': lambda column, value: column.like(f"%{value}%"),
+    'in': lambda column, value: column.in_(value) if isinstance(value, list) else None,
+}
+
+# 排序方向 -> 排序函数（未知方向按升序）
+_SORT_DIRECTIONS = {"asc": asc, "desc": desc}
+
+# 按ID直接更新时不允许修改的字段（与 BaseModel.update_from_dict 默认排除一致）
+_PROTECTED_UPDATE_FIELDS = frozenset({'id', 'created_at', 'tenant_id'})
+
 
 class BaseDAO(Generic[T]):
     """基础DAO类"""
@@ -26,6 +46,13 @@ class BaseDAO(Generic[T]):
     def __init__(self, model: Type[T]):
         self.model = model
         self.db_manager = db_manager
+        # 列名 -> 列属性映射（构造时生成一次，过滤/搜索/排序按字典查找）
+        self._columns = {
+            attr.key: getattr(model, attr.key)
+            for attr in sa_inspect(model).column_attrs
+        }
+        self._tenant_column = self._columns.get('tenant_id')
+        self._deleted_column = self._columns.get('is_deleted')
     
     def get_session(self) -> Session:
         """获取数据库会话"""
@@ -36,12 +63,12 @@ class BaseDAO(Generic[T]):
         query = db.query(self.model)
         
         # 添加租户过滤
-        if tenant_id and hasattr(self.model, 'tenant_id') and settings.tenant_isolation:
-            query = query.filter(self.model.tenant_id == tenant_id)
+        if tenant_id and self._tenant_column is not None and TENANT_ISOLATION:
+            query = query.filter(self._tenant_column == tenant_id)
         
         # 添加软删除过滤
-        if hasattr(self.model, 'is_deleted'):
-            query = query.filter(self.model.is_deleted == False)
+        if self._deleted_column is not None:
+            query = query.filter(self._deleted_column == False)
         
         return query
     
@@ -114,7 +141,7 @@ class BaseDAO(Generic[T]):
         tenant_id: str = None,
         filters: Dict[str, Any] = None,
         search: str = None,
-        search_fields: List[str] = None,
+        search_fields: Sequence[str] = None,
         sort_by: str = None,
         sort_order: str = "asc",
         offset: int = 0,
@@ -157,12 +184,56 @@ class BaseDAO(Generic[T]):
             if close_session:
                 _db.close()
     
+    def iter_list(
+        self,
+        tenant_id: str = None,
+        filters: Dict[str, Any] = None,
+        search: str = None,
+        search_fields: Sequence[str] = None,
+        sort_by: str = None,
+        sort_order: str = "asc",
+        batch_size: int = 500,
+        db: Session = None
+    ) -> Iterator[List[T]]:
+        """分批迭代记录列表（流式导出用，按批从游标读取）"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        try:
+            query = self._get_base_query(_db, tenant_id)
+            
+            if filters:
+                query = self._apply_filters(query, filters)
+            
+            if search and search_fields:
+                query = self._apply_search(query, search, search_fields)
+            
+            if sort_by:
+                query = self._apply_sorting(query, sort_by, sort_order)
+            
+            batch = []
+            for obj in query.yield_per(batch_size):
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+            
+        except SQLAlchemyError as e:
+            logger.error(f"迭代{self.model.__name__}列表失败: {e}")
+            raise DatabaseError(f"查询列表失败", operation="iter_list", details={"error": str(e)})
+        
+        finally:
+            if close_session:
+                _db.close()
+    
     def count(
         self,
         tenant_id: str = None,
         filters: Dict[str, Any] = None,
         search: str = None,
-        search_fields: List[str] = None,
+        search_fields: Sequence[str] = None,
         db: Session = None
     ) -> int:
         """计算记录数量"""
@@ -245,10 +316,73 @@ class BaseDAO(Generic[T]):
             if close_session:
                 _db.close()
     
+    def fast_update_by_id(self, id: str, data: Dict[str, Any], tenant_id: str = None, db: Session = None) -> int:
+        """根据ID直接更新记录（单条UPDATE语句，不加载对象），不存在则抛出404异常"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        values = {
+            key: value for key, value in data.items()
+            if key in self._columns and key not in _PROTECTED_UPDATE_FIELDS
+        }
+        
+        try:
+            query = self._get_base_query(_db, tenant_id).filter(self.model.id == id)
+            if values:
+                count = query.update(values, synchronize_session=False)
+                _db.commit()
+            else:
+                count = query.count()
+            
+        except SQLAlchemyError as e:
+            _db.rollback()
+            logger.error(f"更新{self.model.__name__}记录失败: {e}")
+            raise DatabaseError(f"更新记录失败", operation="update", details={"error": str(e)})
+        
+        finally:
+            if close_session:
+                _db.close()
+        
+        if count == 0:
+            raise NotFoundError(self.model.__name__, id)
+        logger.info(f"更新{self.model.__name__}记录成功: {id}")
+        return count
+    
     def delete_by_id(self, id: str, tenant_id: str = None, soft_delete: bool = True, deleted_by: str = None, db: Session = None) -> bool:
-        """根据ID删除记录"""
-        obj = self.get_by_id_or_404(id, tenant_id, db)
-        return self.delete(obj, soft_delete, deleted_by, db)
+        """根据ID删除记录（软删除为单条UPDATE语句，不先查询对象），不存在则抛出404异常"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        try:
+            query = self._get_base_query(_db, tenant_id).filter(self.model.id == id)
+            
+            if soft_delete and self._deleted_column is not None:
+                values = {'is_deleted': True, 'deleted_at': func.now()}
+                if deleted_by:
+                    values['deleted_by'] = deleted_by
+                count = query.update(values, synchronize_session=False)
+            else:
+                # 硬删除经由ORM工作单元，由关系配置处理子表外键
+                obj = query.first()
+                count = 0 if obj is None else 1
+                if obj is not None:
+                    _db.delete(obj)
+            
+            _db.commit()
+            
+        except SQLAlchemyError as e:
+            _db.rollback()
+            logger.error(f"删除{self.model.__name__}记录失败: {e}")
+            raise DatabaseError(f"删除记录失败", operation="delete", details={"error": str(e)})
+        
+        finally:
+            if close_session:
+                _db.close()
+        
+        if count == 0:
+            raise NotFoundError(self.model.__name__, id)
+        logger.info(f"删除{self.model.__name__}记录成功: {id}")
+        return True
     
     def bulk_create(self, objects: List[T], db: Session = None) -> List[T]:
         """批量创建记录"""
@@ -259,9 +393,11 @@ class BaseDAO(Generic[T]):
             _db.add_all(objects)
             _db.commit()
             
-            # 刷新对象以获取ID
-            for obj in objects:
-                _db.refresh(obj)
+            # 一次查询刷新数据库生成的字段（替代逐条refresh）
+            if objects:
+                _db.query(self.model).filter(
+                    self.model.id.in_([obj.id for obj in objects])
+                ).populate_existing().all()
             
             logger.info(f"批量创建{self.model.__name__}记录成功: {len(objects)}条")
             return objects
@@ -295,6 +431,63 @@ class BaseDAO(Generic[T]):
             if close_session:
                 _db.close()
     
+    def get_by_ids(self, ids: List[str], tenant_id: str = None, db: Session = None) -> List[T]:
+        """根据ID列表批量获取记录"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        try:
+            if not ids:
+                return []
+            query = self._get_base_query(_db, tenant_id)
+            return query.filter(self.model.id.in_(ids)).all()
+        finally:
+            if close_session:
+                _db.close()
+    
+    def bulk_delete_by_ids(
+        self,
+        ids: List[str],
+        tenant_id: str = None,
+        soft_delete: bool = True,
+        deleted_by: str = None,
+        db: Session = None
+    ) -> int:
+        """批量删除记录（软删除为单条UPDATE语句）"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        try:
+            if not ids:
+                return 0
+            
+            query = self._get_base_query(_db, tenant_id).filter(self.model.id.in_(ids))
+            
+            if soft_delete and self._deleted_column is not None:
+                values = {'is_deleted': True, 'deleted_at': func.now()}
+                if deleted_by:
+                    values['deleted_by'] = deleted_by
+                count = query.update(values, synchronize_session=False)
+            else:
+                # 硬删除经由ORM工作单元，由关系配置处理子表外键
+                objects = query.all()
+                for obj in objects:
+                    _db.delete(obj)
+                count = len(objects)
+            
+            _db.commit()
+            logger.info(f"批量删除{self.model.__name__}记录成功: {count}条")
+            return count
+            
+        except SQLAlchemyError as e:
+            _db.rollback()
+            logger.error(f"批量删除{self.model.__name__}记录失败: {e}")
+            raise DatabaseError(f"批量删除记录失败", operation="bulk_delete", details={"error": str(e)})
+        
+        finally:
+            if close_session:
+                _db.close()
+    
     def exists(self, id: str, tenant_id: str = None, db: Session = None) -> bool:
         """检查记录是否存在"""
         return self.get_by_id(id, tenant_id, db) is not None
@@ -308,10 +501,10 @@ class BaseDAO(Generic[T]):
             query = self._get_base_query(_db, tenant_id)
             
             # 添加字段过滤
-            if hasattr(self.model, field):
-                query = query.filter(getattr(self.model, field) == value)
-            else:
+            column = self._columns.get(field)
+            if column is None:
                 return False
+            query = query.filter(column == value)
             
             # 排除特定ID
             if exclude_id:
@@ -330,53 +523,39 @@ class BaseDAO(Generic[T]):
     def _apply_filters(self, query: Query, filters: Dict[str, Any]) -> Query:
         """应用过滤条件"""
         for field, value in filters.items():
-            if not hasattr(self.model, field) or value is None:
+            column = self._columns.get(field)
+            if column is None or value is None:
                 continue
             
             # 处理不同类型的过滤
             if isinstance(value, dict):
                 # 复杂过滤条件
-                operator = value.get('operator', 'eq')
-                filter_value = value.get('value')
-                
-                if operator == 'eq':
-                    query = query.filter(getattr(self.model, field) == filter_value)
-                elif operator == 'ne':
-                    query = query.filter(getattr(self.model, field) != filter_value)
-                elif operator == 'gt':
-                    query = query.filter(getattr(self.model, field) > filter_value)
-                elif operator == 'gte':
-                    query = query.filter(getattr(self.model, field) >= filter_value)
-                elif operator == 'lt':
-                    query = query.filter(getattr(self.model, field) < filter_value)
-                elif operator == 'lte':
-                    query = query.filter(getattr(self.model, field) <= filter_value)
-                elif operator == 'like':
-                    query = query.filter(getattr(self.model, field).like(f"%{filter_value}%"))
-                elif operator == 'in':
-                    if isinstance(filter_value, list):
-                        query = query.filter(getattr(self.model, field).in_(filter_value))
+                build = _FILTER_OPERATORS.get(value.get('operator', 'eq'))
+                if build is not None:
+                    condition = build(column, value.get('value'))
+                    if condition is not None:
+                        query = query.filter(condition)
                 
             elif isinstance(value, list):
                 # IN过滤
-                query = query.filter(getattr(self.model, field).in_(value))
+                query = query.filter(column.in_(value))
             else:
                 # 等值过滤
-                query = query.filter(getattr(self.model, field) == value)
+                query = query.filter(column == value)
         
         return query
     
-    def _apply_search(self, query: Query, search: str, search_fields: List[str]) -> Query:
+    def _apply_search(self, query: Query, search: str, search_fields: Sequence[str]) -> Query:
         """应用搜索条件"""
         if not search or not search_fields:
             return query
         
-        search_conditions = []
-        for field in search_fields:
-            if hasattr(self.model, field):
-                search_conditions.append(
-                    getattr(self.model, field).like(f"%{search}%")
-                )
+        pattern = f"%{search}%"
+        search_conditions = [
+            self._columns[field].like(pattern)
+            for field in search_fields
+            if field in self._columns
+        ]
         
         if search_conditions:
             query = query.filter(or_(*search_conditions))
@@ -385,17 +564,11 @@ class BaseDAO(Generic[T]):
     
     def _apply_sorting(self, query: Query, sort_by: str, sort_order: str = "asc") -> Query:
         """应用排序"""
-        if not hasattr(self.model, sort_by):
+        sort_field = self._columns.get(sort_by)
+        if sort_field is None:
             return query
         
-        sort_field = getattr(self.model, sort_by)
-        
-        if sort_order.lower() == "desc":
-            query = query.order_by(desc(sort_field))
-        else:
-            query = query.order_by(asc(sort_field))
-        
-        return query
+        return query.order_by(_SORT_DIRECTIONS.get(sort_order.lower(), asc)(sort_field))
     
     def execute_raw_query(self, sql: str, params: Dict[str, Any] = None, db: Session = None) -> Any:
         """执行原始SQL查询"""
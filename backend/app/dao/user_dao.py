@@ -8,8 +8,10 @@ from sqlalchemy import and_, or_, func
 from sqlalchemy.orm import Session, joinedload
 
 from .base_dao import BaseDAO
+from ..config.settings import TENANT_ISOLATION
 from ..models.user import User, Role, Permission, UserRole, RolePermission, UserSession
 from ..core.exceptions import NotFoundError, ValidationError
+from ..core.permission_cache import permission_cache
 
 
 class UserDAO(BaseDAO[User]):
@@ -86,6 +88,49 @@ class UserDAO(BaseDAO[User]):
             if close_session:
                 _db.close()
     
+    def get_roles_and_permissions(self, user_id: str, tenant_id: str = None, db: Session = None) -> Dict[str, Any]:
+        """单次查询获取用户角色及权限"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        try:
+            query = _db.query(
+                Role.code, Role.name, Role.is_active, Permission.code.label('permission_code')
+            ).select_from(UserRole).join(
+                Role, UserRole.role_id == Role.id
+            ).outerjoin(
+                RolePermission, RolePermission.role_id == Role.id
+            ).outerjoin(
+                Permission, and_(
+                    RolePermission.permission_id == Permission.id,
+                    Permission.is_active == True
+                )
+            ).filter(
+                UserRole.user_id == user_id,
+                UserRole.is_deleted == False
+            )
+            
+            if tenant_id:
+                query = query.filter(Role.tenant_id == tenant_id)
+                if TENANT_ISOLATION:
+                    query = query.filter(UserRole.tenant_id == tenant_id)
+            
+            # 单次遍历聚合：角色按出现顺序去重，权限仅取自启用的角色
+            roles: Dict[str, str] = {}
+            permissions: Dict[str, None] = {}
+            for role_code, role_name, role_active, permission_code in query:
+                roles.setdefault(role_code, role_name)
+                if role_active and permission_code is not None:
+                    permissions[permission_code] = None
+            
+            return {
+                "roles": [{"code": code, "name": name} for code, name in roles.items()],
+                "permissions": list(permissions),
+            }
+        finally:
+            if close_session:
+                _db.close()
+    
     def get_users_by_role(self, role_code: str, tenant_id: str = None, db: Session = None) -> List[User]:
         """根据角色获取用户列表"""
         _db = db or self.get_session()
@@ -206,6 +251,48 @@ class RoleDAO(BaseDAO[Role]):
     def __init__(self):
         super().__init__(Role)
     
+    def invalidate_role_holders(self, role_id: str, db: Session = None) -> None:
+        """失效持有该角色的所有用户的权限缓存（角色权限或状态变更后调用）"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        try:
+            holders = _db.query(UserRole.user_id, UserRole.tenant_id).filter(
+                UserRole.role_id == role_id,
+                UserRole.is_deleted == False
+            ).all()
+        finally:
+            if close_session:
+                _db.close()
+        
+        for user_id, tenant_id in holders:
+            permission_cache.invalidate_nowait(user_id, tenant_id)
+    
+    def update(self, obj: Role, data: Dict[str, Any], db: Session = None) -> Role:
+        """更新角色（含启用/停用），并失效持有者的权限缓存"""
+        result = super().update(obj, data, db)
+        self.invalidate_role_holders(obj.id, db)
+        return result
+    
+    def fast_update_by_id(self, id: str, data: Dict[str, Any], tenant_id: str = None, db: Session = None) -> int:
+        """按ID更新角色，并失效持有者的权限缓存"""
+        count = super().fast_update_by_id(id, data, tenant_id, db)
+        self.invalidate_role_holders(id, db)
+        return count
+    
+    def delete(self, obj: Role, soft_delete: bool = True, deleted_by: str = None, db: Session = None) -> bool:
+        """删除角色，并失效持有者的权限缓存"""
+        role_id = obj.id
+        result = super().delete(obj, soft_delete, deleted_by, db)
+        self.invalidate_role_holders(role_id, db)
+        return result
+    
+    def delete_by_id(self, id: str, tenant_id: str = None, soft_delete: bool = True, deleted_by: str = None, db: Session = None) -> bool:
+        """按ID删除角色，并失效持有者的权限缓存"""
+        result = super().delete_by_id(id, tenant_id, soft_delete, deleted_by, db)
+        self.invalidate_role_holders(id, db)
+        return result
+    
     def get_by_code(self, code: str, tenant_id: str = None, db: Session = None) -> Optional[Role]:
         """根据角色代码获取角色"""
         _db = db or self.get_session()
@@ -275,6 +362,9 @@ class RoleDAO(BaseDAO[Role]):
                 _db.add(role_permission)
             
             _db.commit()
+            
+            # 角色权限已变更，持有该角色的用户缓存随之失效
+            self.invalidate_role_holders(role_id, _db)
             return True
         finally:
             if close_session:
@@ -321,6 +411,51 @@ class UserRoleDAO(BaseDAO[UserRole]):
             if close_session:
                 _db.close()
     
+    def assign_roles(
+        self,
+        user_id: str,
+        role_ids: List[str],
+        tenant_id: str = None,
+        created_by: str = None,
+        db: Session = None
+    ) -> int:
+        """批量为用户分配角色（单个事务，已存在的关联跳过），返回新增数量"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        try:
+            if not role_ids:
+                return 0
+            
+            existing = {
+                role_id for (role_id,) in _db.query(UserRole.role_id).filter(
+                    and_(
+                        UserRole.user_id == user_id,
+                        UserRole.role_id.in_(role_ids)
+                    )
+                )
+            }
+            
+            new_roles = [
+                UserRole(
+                    user_id=user_id,
+                    role_id=role_id,
+                    tenant_id=tenant_id,
+                    created_by=created_by
+                )
+                for role_id in dict.fromkeys(role_ids)
+                if role_id not in existing
+            ]
+            
+            if new_roles:
+                _db.add_all(new_roles)
+                _db.commit()
+            
+            return len(new_roles)
+        finally:
+            if close_session:
+                _db.close()
+    
     def remove_role(self, user_id: str, role_id: str, db: Session = None) -> bool:
         """移除用户角色"""
         _db = db or self.get_session()
@@ -354,6 +489,29 @@ class UserRoleDAO(BaseDAO[UserRole]):
         finally:
             if close_session:
                 _db.close()
+    
+    def get_user_role_rows(self, user_id: str, tenant_id: str = None, db: Session = None) -> List[Dict[str, Any]]:
+        """获取用户角色（仅查询响应所需列，返回字典列表，不构造ORM对象）"""
+        _db = db or self.get_session()
+        close_session = db is None
+        
+        try:
+            query = _db.query(
+                Role.id, Role.name, Role.code, Role.description, Role.is_active, Role.is_system
+            ).select_from(UserRole).join(
+                Role, UserRole.role_id == Role.id
+            ).filter(
+                UserRole.user_id == user_id,
+                UserRole.is_deleted == False
+            )
+            
+            if tenant_id and TENANT_ISOLATION:
+                query = query.filter(UserRole.tenant_id == tenant_id)
+            
+            return [dict(row._mapping) for row in query]
+        finally:
+            if close_session:
+                _db.close()
 
 
 class UserSessionDAO(BaseDAO[UserSession]):
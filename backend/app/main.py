@@ -8,10 +8,13 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from .config.settings import settings
-from .config.database import init_database
+from .config.database import init_database, configure_thread_limiter
+from .config.tenant_config import tenant_config_manager
+from .core.permission_cache import permission_cache
+from .core.redis_client import close_redis
 from .core.middleware import setup_middleware
 from .core.exceptions import setup_exception_handlers
 from .controllers.user_controller import UserController
@@ -33,10 +36,16 @@ async def lifespan(app: FastAPI):
     logger.info("启动应用...")
     
     try:
+        # 调整线程池上限，同步数据库操作在线程池中执行
+        configure_thread_limiter()
+        
         # 初始化数据库
         init_database()
         logger.info("数据库初始化完成")
         
+        # 连接权限缓存（Redis可选）
+        await permission_cache.connect()
+        
         # 其他初始化逻辑
         logger.info("应用启动完成")
         
@@ -46,7 +55,10 @@ async def lifespan(app: FastAPI):
         logger.error(f"应用启动失败: {e}")
         raise
     finally:
-        # 关闭时执行
+        # 关闭时执行：写入尚未落盘的租户配置
+        await tenant_config_manager.close()
+        await permission_cache.close()
+        await close_redis()
         logger.info("应用关闭")
 
 
@@ -58,7 +70,8 @@ app = FastAPI(
     docs_url=settings.docs_url if not settings.environment == "production" else None,
     redoc_url=settings.redoc_url if not settings.environment == "production" else None,
     openapi_url=settings.openapi_url if not settings.environment == "production" else None,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # 设置中间件
@@ -182,7 +195,8 @@ api_v1.post(
 # 角色权限相关路由
 api_v1.get(
     "/users/{user_id}/roles",
-    response_model=user_controller.StandardResponse,
+    response_model=None,
+    response_class=ORJSONResponse,
     tags=["用户管理"],
     summary="获取用户角色"
 )(user_controller.get_user_roles)
@@ -203,7 +217,8 @@ api_v1.delete(
 
 api_v1.get(
     "/users/{user_id}/permissions",
-    response_model=user_controller.StandardResponse,
+    response_model=None,
+    response_class=ORJSONResponse,
     tags=["用户管理"],
     summary="获取用户权限"
 )(user_controller.get_user_permissions)
@@ -211,14 +226,16 @@ api_v1.get(
 # 搜索和查询路由
 api_v1.get(
     "/users/search",
-    response_model=user_controller.StandardResponse,
+    response_model=None,
+    response_class=ORJSONResponse,
     tags=["用户管理"],
     summary="搜索用户"
 )(user_controller.search_users)
 
 api_v1.get(
     "/users/by-role",
-    response_model=user_controller.StandardResponse,
+    response_model=None,
+    response_class=ORJSONResponse,
     tags=["用户管理"],
     summary="根据角色获取用户"
 )(user_controller.get_users_by_role)
@@ -226,7 +243,8 @@ api_v1.get(
 # 当前用户相关路由
 api_v1.get(
     "/users/me/profile",
-    response_model=user_controller.StandardResponse,
+    response_model=None,
+    response_class=ORJSONResponse,
     tags=["个人中心"],
     summary="获取个人信息"
 )(user_controller.get_current_user_info)
@@ -267,28 +285,37 @@ api_v1.get(
 )(user_controller.export_excel)
 
 # 认证相关路由
-from .controllers.auth_controller import AuthController
+from .controllers.auth_controller import AuthController, LoginRequest, RefreshTokenRequest, msgspec_openapi_body
 
 auth_controller = AuthController()
 
 api_v1.post(
     "/auth/login",
     tags=["认证"],
-    summary="用户登录"
+    summary="用户登录",
+    openapi_extra=msgspec_openapi_body(LoginRequest)
 )(auth_controller.login)
 
 api_v1.post(
     "/auth/logout",
     tags=["认证"],
-    summary="用户登出"
+    summary="用户登出",
+    openapi_extra=msgspec_openapi_body(RefreshTokenRequest, required=False)
 )(auth_controller.logout)
 
 api_v1.post(
     "/auth/refresh",
     tags=["认证"],
-    summary="刷新令牌"
+    summary="刷新令牌",
+    openapi_extra=msgspec_openapi_body(RefreshTokenRequest)
 )(auth_controller.refresh_token)
 
+api_v1.get(
+    "/auth/me",
+    tags=["认证"],
+    summary="获取当前用户信息"
+)(auth_controller.get_current_user_info)
+
 # 将API路由添加到主应用
 app.include_router(api_v1)
 
@@ -299,7 +326,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     """全局异常处理器"""
     logger.error(f"未处理的异常: {exc}", exc_info=True)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": {
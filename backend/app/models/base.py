@@ -8,12 +8,12 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import Column, String, DateTime, Boolean, Text, Integer
-from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.orm import declared_attr
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
 from ..config.database import Base
-from ..config.settings import settings
+from ..config.settings import settings, TENANT_ISOLATION
 
 
 def generate_uuid():
@@ -184,7 +184,7 @@ class BaseModel(Base, TimestampMixin, TenantMixin, SoftDeleteMixin, AuditMixin):
     @classmethod
     def get_tenant_query(cls, query, tenant_id: str):
         """获取租户记录的查询"""
-        if settings.tenant_isolation:
+        if TENANT_ISOLATION:
             return query.filter(cls.tenant_id == tenant_id)
         return query
     
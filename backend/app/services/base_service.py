@@ -4,7 +4,7 @@
 """
 
 import logging
-from typing import Type, TypeVar, Generic, Optional, List, Dict, Any, Union
+from typing import Type, TypeVar, Generic, Optional, List, Dict, Any, Iterator, Sequence, Union
 from abc import ABC, abstractmethod
 
 from ..dao.base_dao import BaseDAO
@@ -111,7 +111,7 @@ class BaseService(Generic[T, D], ABC):
         tenant_context: TenantContext = None,
         filters: Dict[str, Any] = None,
         search: str = None,
-        search_fields: List[str] = None,
+        search_fields: Sequence[str] = None,
         sort_by: str = None,
         sort_order: str = "asc",
         page: int = 1,
@@ -153,6 +153,28 @@ class BaseService(Generic[T, D], ABC):
             }
         }
     
+    def iter_list(
+        self,
+        tenant_context: TenantContext = None,
+        filters: Dict[str, Any] = None,
+        search: str = None,
+        search_fields: Sequence[str] = None,
+        sort_by: str = None,
+        sort_order: str = "asc",
+        batch_size: int = 500
+    ) -> Iterator[List[T]]:
+        """分批迭代记录列表"""
+        tenant_id = tenant_context.tenant_id if tenant_context else None
+        return self.dao.iter_list(
+            tenant_id=tenant_id,
+            filters=filters,
+            search=search,
+            search_fields=search_fields,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            batch_size=batch_size
+        )
+    
     def update(
         self,
         id: str,
@@ -217,6 +239,102 @@ class BaseService(Generic[T, D], ABC):
             logger.error(f"删除{self.dao.model.__name__}失败: {e}")
             raise
     
+    def bulk_create(
+        self,
+        data_list: List[Dict[str, Any]],
+        tenant_context: TenantContext = None,
+        created_by: str = None
+    ) -> List[T]:
+        """批量创建记录（单事务写入）"""
+        try:
+            objects = []
+            for data in data_list:
+                self._validate_create_data(data, tenant_context)
+                processed_data = self._pre_create(data, tenant_context)
+                if created_by:
+                    processed_data['created_by'] = created_by
+                objects.append(self.dao.model(**processed_data))
+            
+            created_objects = self.dao.bulk_create(objects)
+            
+            results = [self._post_create(obj, tenant_context) for obj in created_objects]
+            logger.info(f"批量创建{self.dao.model.__name__}成功: {len(results)}条")
+            return results
+            
+        except Exception as e:
+            logger.error(f"批量创建{self.dao.model.__name__}失败: {e}")
+            raise
+    
+    def bulk_update(
+        self,
+        updates: List[Dict[str, Any]],
+        tenant_context: TenantContext = None,
+        updated_by: str = None
+    ) -> List[T]:
+        """批量更新记录（一次查询加载，一次批量UPDATE）"""
+        try:
+            tenant_id = tenant_context.tenant_id if tenant_context else None
+            ids = [update['id'] for update in updates]
+            objects = {obj.id: obj for obj in self.dao.get_by_ids(ids, tenant_id)}
+            
+            missing = [id for id in ids if id not in objects]
+            if missing:
+                raise NotFoundError(self.dao.model.__name__, ', '.join(missing))
+            
+            # 仅保留模型列，不可修改字段与 update_from_dict 保持一致
+            columns = set(self.dao.model.__table__.columns.keys()) - {'id', 'created_at', 'tenant_id'}
+            mappings = []
+            for update in updates:
+                obj = objects[update['id']]
+                self._validate_update_data(update['data'], obj, tenant_context)
+                processed_data = self._pre_update(obj, update['data'], tenant_context)
+                if updated_by:
+                    processed_data['updated_by'] = updated_by
+                mapping = {k: v for k, v in processed_data.items() if k in columns}
+                mapping['id'] = obj.id
+                mappings.append(mapping)
+            
+            self.dao.bulk_update(mappings)
+            
+            updated_objects = self.dao.get_by_ids(ids, tenant_id)
+            results = [self._post_update(obj, tenant_context) for obj in updated_objects]
+            logger.info(f"批量更新{self.dao.model.__name__}成功: {len(results)}条")
+            return results
+            
+        except Exception as e:
+            logger.error(f"批量更新{self.dao.model.__name__}失败: {e}")
+            raise
+    
+    def bulk_delete(
+        self,
+        ids: List[str],
+        tenant_context: TenantContext = None,
+        soft_delete: bool = True,
+        deleted_by: str = None
+    ) -> int:
+        """批量删除记录（单条语句删除）"""
+        try:
+            tenant_id = tenant_context.tenant_id if tenant_context else None
+            objects = self.dao.get_by_ids(ids, tenant_id)
+            
+            for obj in objects:
+                if not self._pre_delete(obj, tenant_context):
+                    raise BusinessLogicError("无法删除该记录")
+            
+            count = self.dao.bulk_delete_by_ids(
+                [obj.id for obj in objects], tenant_id, soft_delete, deleted_by
+            )
+            
+            for obj in objects:
+                self._post_delete(obj, tenant_context)
+            
+            logger.info(f"批量删除{self.dao.model.__name__}成功: {count}条")
+            return count
+            
+        except Exception as e:
+            logger.error(f"批量删除{self.dao.model.__name__}失败: {e}")
+            raise
+    
     def exists(self, id: str, tenant_context: TenantContext = None) -> bool:
         """检查记录是否存在"""
         tenant_id = tenant_context.tenant_id if tenant_context else None
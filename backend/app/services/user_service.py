@@ -3,18 +3,24 @@
 提供用户相关的业务逻辑操作
 """
 
+import logging
 import re
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
+import anyio
+
 from .base_service import BaseService
 from ..dao.user_dao import UserDAO, RoleDAO, UserRoleDAO
 from ..models.user import User, Role, UserRole
 from ..core.dependencies import TenantContext
 from ..core.security import security_manager
-from ..core.exceptions import BusinessLogicError, ValidationError, AuthenticationError
+from ..core.permission_cache import permission_cache
+from ..core.exceptions import BusinessLogicError, ValidationError, AuthenticationError, NotFoundError
 from ..config.settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 class UserService(BaseService[User, UserDAO]):
     """用户服务"""
@@ -149,6 +155,11 @@ class UserService(BaseService[User, UserDAO]):
         
         return obj
     
+    def _post_update(self, obj: User, tenant_context: TenantContext = None) -> User:
+        """更新用户后处理：失效用户信息与权限缓存"""
+        permission_cache.invalidate_nowait(obj.id, tenant_context.tenant_id if tenant_context else None)
+        return obj
+    
     def create_user(
         self,
         data: Dict[str, Any],
@@ -180,8 +191,9 @@ class UserService(BaseService[User, UserDAO]):
                 else:
                     raise AuthenticationError("账户已被禁用")
             
-            # 验证密码
-            if not security_manager.verify_password(password, user.password_hash):
+            # 验证密码（存量bcrypt哈希校验通过后返回新的Argon2id哈希）
+            valid, new_hash = security_manager.verify_and_update_password(password, user.password_hash)
+            if not valid:
                 # 增加失败登录次数
                 failed_count = self.dao.increment_failed_login(user.id)
                 
@@ -203,6 +215,13 @@ class UserService(BaseService[User, UserDAO]):
                 
                 raise AuthenticationError("用户名或密码错误")
             
+            # 惰性升级密码哈希（按ID单条UPDATE；升级失败不影响本次登录）
+            if new_hash:
+                try:
+                    self.dao.fast_update_by_id(user.id, {'password_hash': new_hash})
+                except Exception as e:
+                    logger.warning(f"升级用户 {user.id} 密码哈希失败: {e}")
+            
             # 更新最后登录时间
             self.dao.update_last_login(user.id)
             
@@ -240,7 +259,8 @@ class UserService(BaseService[User, UserDAO]):
             'locked_until': None  # 解锁账户
         }
         
-        self.dao.update(user, update_data)
+        updated_user = self.dao.update(user, update_data)
+        self._post_update(updated_user, tenant_context)
         return True
     
     def reset_password(
@@ -266,7 +286,8 @@ class UserService(BaseService[User, UserDAO]):
             'updated_by': reset_by
         }
         
-        self.dao.update(user, update_data)
+        updated_user = self.dao.update(user, update_data)
+        self._post_update(updated_user, tenant_context)
         return True
     
     def lock_user(self, user_id: str, tenant_context: TenantContext = None, locked_by: str = None) -> bool:
@@ -283,7 +304,8 @@ class UserService(BaseService[User, UserDAO]):
             'updated_by': locked_by
         }
         
-        self.dao.update(user, update_data)
+        updated_user = self.dao.update(user, update_data)
+        self._post_update(updated_user, tenant_context)
         return True
     
     def unlock_user(self, user_id: str, tenant_context: TenantContext = None, unlocked_by: str = None) -> bool:
@@ -296,7 +318,8 @@ class UserService(BaseService[User, UserDAO]):
             'updated_by': unlocked_by
         }
         
-        self.dao.update(user, update_data)
+        updated_user = self.dao.update(user, update_data)
+        self._post_update(updated_user, tenant_context)
         return True
     
     def activate_user(self, user_id: str, tenant_context: TenantContext = None, activated_by: str = None) -> bool:
@@ -343,9 +366,33 @@ class UserService(BaseService[User, UserDAO]):
             tenant_context.tenant_id if tenant_context else None,
             assigned_by
         )
+        permission_cache.invalidate_nowait(user_id, tenant_context.tenant_id if tenant_context else None)
         
         return True
     
+    def assign_roles_bulk(
+        self,
+        user_id: str,
+        role_ids: List[str],
+        tenant_context: TenantContext = None,
+        assigned_by: str = None
+    ) -> int:
+        """批量为用户分配角色（一次校验、一次写入），返回分配的角色数"""
+        tenant_id = tenant_context.tenant_id if tenant_context else None
+        role_ids = list(dict.fromkeys(role_ids))
+        
+        # 检查用户和角色是否存在
+        self.get_by_id_or_404(user_id, tenant_context)
+        found_ids = {role.id for role in self.role_dao.get_by_ids(role_ids, tenant_id)}
+        for role_id in role_ids:
+            if role_id not in found_ids:
+                raise NotFoundError("Role", role_id)
+        
+        self.user_role_dao.assign_roles(user_id, role_ids, tenant_id, assigned_by)
+        permission_cache.invalidate_nowait(user_id, tenant_id)
+        
+        return len(role_ids)
+    
     def remove_role(
         self,
         user_id: str,
@@ -361,17 +408,60 @@ class UserService(BaseService[User, UserDAO]):
             if len(user_roles) <= 1:
                 raise BusinessLogicError("不能移除超级用户的最后一个角色")
         
-        return self.user_role_dao.remove_role(user_id, role_id)
+        removed = self.user_role_dao.remove_role(user_id, role_id)
+        permission_cache.invalidate_nowait(user_id, tenant_context.tenant_id if tenant_context else None)
+        return removed
     
     def get_user_roles(self, user_id: str, tenant_context: TenantContext = None) -> List[Role]:
         """获取用户角色列表"""
         user_roles = self.user_role_dao.get_user_roles(user_id, tenant_context.tenant_id if tenant_context else None)
         return [ur.role for ur in user_roles]
     
+    def get_user_role_rows(self, user_id: str, tenant_context: TenantContext = None) -> List[Dict[str, Any]]:
+        """获取用户角色列表（列投影查询，直接返回响应字典）"""
+        return self.user_role_dao.get_user_role_rows(user_id, tenant_context.tenant_id if tenant_context else None)
+    
     def get_user_permissions(self, user_id: str, tenant_context: TenantContext = None) -> List[str]:
         """获取用户权限列表"""
         return self.dao.get_user_permissions(user_id, tenant_context.tenant_id if tenant_context else None)
     
+    def get_roles_and_permissions(self, user_id: str, tenant_context: TenantContext = None) -> Dict[str, Any]:
+        """一次查询获取用户角色和权限
+
+        返回 {"roles": [{"code", "name"}], "permissions": [...]}
+        """
+        return self.dao.get_roles_and_permissions(user_id, tenant_context.tenant_id if tenant_context else None)
+    
+    # 异步版本：同步ORM调用放到线程池执行，避免阻塞事件循环
+    
+    async def aauthenticate_user(self, username: str, password: str, tenant_context: TenantContext = None) -> Optional[User]:
+        """用户认证（异步）"""
+        return await anyio.to_thread.run_sync(self.authenticate_user, username, password, tenant_context)
+    
+    async def aget_by_id(self, id: str, tenant_context: TenantContext = None) -> Optional[User]:
+        """根据ID获取用户（异步）"""
+        return await anyio.to_thread.run_sync(self.get_by_id, id, tenant_context)
+    
+    async def aget_by_id_or_404(self, id: str, tenant_context: TenantContext = None) -> User:
+        """根据ID获取用户，不存在则抛出404异常（异步）"""
+        return await anyio.to_thread.run_sync(self.get_by_id_or_404, id, tenant_context)
+    
+    async def aget_user_roles(self, user_id: str, tenant_context: TenantContext = None) -> List[Role]:
+        """获取用户角色列表（异步）"""
+        return await anyio.to_thread.run_sync(self.get_user_roles, user_id, tenant_context)
+    
+    async def aget_user_role_rows(self, user_id: str, tenant_context: TenantContext = None) -> List[Dict[str, Any]]:
+        """获取用户角色列表（列投影，异步）"""
+        return await anyio.to_thread.run_sync(self.get_user_role_rows, user_id, tenant_context)
+    
+    async def aget_user_permissions(self, user_id: str, tenant_context: TenantContext = None) -> List[str]:
+        """获取用户权限列表（异步）"""
+        return await anyio.to_thread.run_sync(self.get_user_permissions, user_id, tenant_context)
+    
+    async def aload_roles_and_permissions(self, user_id: str, tenant_context: TenantContext = None) -> Dict[str, Any]:
+        """加载用户角色和权限（权限缓存的数据库回源）"""
+        return await anyio.to_thread.run_sync(self.get_roles_and_permissions, user_id, tenant_context)
+    
     def search_users(
         self,
         keyword: str,